@@ -0,0 +1,104 @@
+#----------------------------------------------------------------------------#
+# Async database access for the detail pages (ASYNC_DETAIL_PAGES).
+#
+# Each worker process runs one event loop in a background thread, with an
+# async engine per database (the primary and each read replica) and its own
+# connection pool sized by the DB_PROFILE. Request threads submit
+# coroutines to that loop and wait for their result, so the queries of one
+# page run concurrently on separate connections, and the in-flight queries
+# of every request thread of the worker share the one loop and pool.
+#
+# Needs SQLAlchemy's asyncio extra (greenlet) and an async driver: asyncpg
+# for PostgreSQL, aiosqlite for SQLite. They are imported on first use.
+#----------------------------------------------------------------------------#
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+import db_pool
+import db_routing
+
+# sync driver -> async driver of the same database
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+def asyncUrl(url):
+  url = make_url(url)
+  backend = url.get_backend_name()
+  if backend not in ASYNC_DRIVERS:
+    raise ValueError('no async driver known for %s' % backend)
+  return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def engineOptions(config):
+  # db_pool's profile, for the async pool (AsyncAdaptedQueuePool)
+  settings = db_pool.profile(config)
+  if settings.get('nullpool'):
+    return {'poolclass': NullPool, 'pool_pre_ping': settings['pool_pre_ping']}
+  return {
+    'pool_size': settings['pool_size'], 'max_overflow': settings['max_overflow'],
+    'pool_timeout': settings['pool_timeout'], 'pool_recycle': settings['pool_recycle'],
+    'pool_pre_ping': settings['pool_pre_ping'],
+  }
+
+class AsyncDatabase:
+
+  def __init__(self, urls, options):
+    # urls: bind key (None for the primary) -> database URL
+    self.urls = urls
+    self.options = options
+    self.lock = threading.Lock()
+    self.pid = None
+    self.loop = None
+    self.engines = {}
+
+  def start(self):
+    # started lazily, so that a forked worker gets its own loop and pool
+    if self.pid == os.getpid():
+      return
+    with self.lock:
+      if self.pid == os.getpid():
+        return
+      self.loop = asyncio.new_event_loop()
+      threading.Thread(target=self.loop.run_forever, name='async-db', daemon=True).start()
+      self.engines = {}
+      self.pid = os.getpid()
+
+  def engine(self, key=None):
+    engine = self.engines.get(key)
+    if engine is None:
+      from sqlalchemy.ext.asyncio import create_async_engine
+      with self.lock:
+        engine = self.engines.get(key)
+        if engine is None:
+          engine = self.engines[key] = create_async_engine(asyncUrl(self.urls[key]), **self.options)
+    return engine
+
+  def run(self, coroutine_function, key=None, timeout=None):
+    # coroutine_function(engine) on the worker's loop, from a sync caller;
+    # raises TimeoutError after `timeout` seconds, the coroutine cancelled
+    # so that it gives its connections back
+    self.start()
+    future = asyncio.run_coroutine_threadsafe(coroutine_function(self.engine(key)), self.loop)
+    try:
+      return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+      future.cancel()
+      raise TimeoutError('async query not done after %s seconds' % timeout) from None
+
+  def close(self):
+    if self.pid != os.getpid():
+      return
+    for engine in list(self.engines.values()):
+      asyncio.run_coroutine_threadsafe(engine.dispose(), self.loop).result()
+    self.loop.call_soon_threadsafe(self.loop.stop)
+    self.pid = None
+
+def fromConfig(config):
+  urls = {None: config['SQLALCHEMY_DATABASE_URI']}
+  for number, url in enumerate(config.get('DATABASE_REPLICA_URLS') or []):
+    urls[db_routing.REPLICA_BIND % number] = url
+  return AsyncDatabase(urls, engineOptions(config))
@@ -0,0 +1,283 @@
+#----------------------------------------------------------------------------#
+# Per-route benchmark through the Flask test client.
+#
+# Every route of app.py is requested `warmup + repeat` times. The routes
+# write, so `flask bench-routes` runs them on a throwaway database: a fresh
+# seeded SQLite file by default, or --database-url, never the configured
+# one. For each
+# route the suite records latency percentiles, the number of queries of one
+# request and the peak Python memory allocated while answering it
+# (tracemalloc, measured in a separate request so that tracing does not
+# slow down the timed ones). Results can be saved as a baseline and later
+# runs compared against it.
+#
+# startup() measures what a fresh worker or CLI process pays before and
+# during its first request, each run in a new interpreter.
+#
+# detailPages() compares the venue and artist pages served by the sync
+# session and by the async engine (ASYNC_DETAIL_PAGES), under concurrent
+# request threads.
+#----------------------------------------------------------------------------#
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event, func, select
+
+VENUE_FORM = {
+  'name': 'Bench Venue', 'city': 'San Francisco', 'state': 'CA', 'address': '1 Bench St',
+  'phone': '415-000-0000', 'genres': ['Jazz', 'Blues'], 'facebook_link': 'https://www.facebook.com/bench',
+  'image_link': '', 'website_link': '', 'seeking_description': '',
+}
+ARTIST_FORM = {
+  'name': 'Bench Artist', 'city': 'San Francisco', 'state': 'CA', 'phone': '415-000-0000',
+  'genres': ['Jazz'], 'facebook_link': 'https://www.facebook.com/bench',
+  'image_link': '', 'website_link': '', 'seeking_description': '',
+}
+
+def _showForm(ctx, i):
+  # a new artist (created by artist_create) at a different venue each time
+  return {'artist_id': str(ctx['new_artist_id']), 'venue_id': str(ctx['venue_ids'][i % len(ctx['venue_ids'])]),
+      'start_time': '2031-01-01 20:00:00'}
+
+def _showBatch(ctx, i):
+  return [{'artist_id': ctx['new_artist_id'] - 1, 'venue_id': venue_id, 'start_time': '2031-02-01 20:00:00'}
+      for venue_id in ctx['venue_ids'][(i * 10) % len(ctx['venue_ids']):][:10]]
+
+# name, method, path (formatted with the context) and form data, JSON body
+# or a function of (context, iteration) returning one. Writes come last:
+# the creations feed the show and delete routes. Routes named *_stream run
+# with STREAM_LISTINGS on.
+ROUTES = [
+  ('home', 'GET', '/', None),
+  ('venues', 'GET', '/venues', None),
+  ('venues_areas', 'GET', '/venues?areas=1', None),
+  ('venues_genre', 'GET', '/venues?genre=Jazz', None),
+  ('venues_stream', 'GET', '/venues', None),
+  ('venue_search', 'POST', '/venues/search', {'search_term': 'blue'}),
+  ('venue', 'GET', '/venues/{venue_id}', None),
+  ('venue_create_form', 'GET', '/venues/create', None),
+  ('venue_edit_form', 'GET', '/venues/{venue_id}/edit', None),
+  ('artists', 'GET', '/artists', None),
+  ('artists_genre', 'GET', '/artists?genre=Jazz', None),
+  ('artists_stream', 'GET', '/artists', None),
+  ('artist_search', 'POST', '/artists/search', {'search_term': 'band'}),
+  ('artist', 'GET', '/artists/{artist_id}', None),
+  ('artist_edit_form', 'GET', '/artists/{artist_id}/edit', None),
+  ('shows', 'GET', '/shows', None),
+  ('shows_stream', 'GET', '/shows', None),
+  ('show_create_form', 'GET', '/shows/create', None),
+  ('export_venues', 'GET', '/export/venues?state=CA', None),
+  ('api_venues', 'GET', '/api/v1/venues', None),
+  ('api_venue', 'GET', '/api/v1/venues/{venue_id}?fields=name,genres,upcoming_shows,past_shows', None),
+  ('api_artists', 'GET', '/api/v1/artists?fields=id,name,genres', None),
+  ('api_artist', 'GET', '/api/v1/artists/{artist_id}', None),
+  ('api_shows', 'GET', '/api/v1/shows?fields=start_time,venue_name,artist_name', None),
+  ('api_pool', 'GET', '/api/v1/pool', None),
+  ('metrics', 'GET', '/metrics', None),
+  ('venue_create', 'POST', '/venues/create', VENUE_FORM),
+  ('artist_create', 'POST', '/artists/create', ARTIST_FORM),
+  ('venue_edit', 'POST', '/venues/{venue_id}/edit', VENUE_FORM),
+  ('artist_edit', 'POST', '/artists/{artist_id}/edit', ARTIST_FORM),
+  ('show_create', 'POST', '/shows/create', _showForm),
+  ('api_schedule_shows', 'JSON', '/api/v1/shows', _showBatch),
+  ('venue_delete', 'GET', '/venues/{deletable_venue_id}/delete', None),
+]
+
+def _percentile(values, fraction):
+  ordered = sorted(values)
+  return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def context(db, venue_table, artist_table):
+  # ids the routes are formatted with; refreshed before each write route
+  venue_ids = list(db.session.scalars(select(venue_table.c.id).order_by(venue_table.c.id).limit(500)))
+  ctx = {
+    'venue_id': venue_ids[0],
+    'artist_id': db.session.scalar(select(func.min(artist_table.c.id))),
+    'venue_ids': venue_ids,
+    'new_artist_id': db.session.scalar(select(func.max(artist_table.c.id))),
+    'deletable_venue_id': db.session.scalar(select(func.max(venue_table.c.id))),
+  }
+  db.session.close()
+  return ctx
+
+def run(app, db, venue_table, artist_table, repeat=20, warmup=2, only=None, echo=print):
+  client = app.test_client()
+  queries = {'count': 0}
+
+  def count(*args):
+    queries['count'] += 1
+
+  def request(method, path, body):
+    if method == 'JSON':
+      return client.post(path, json=body)
+    if method == 'POST':
+      return client.post(path, data=body)
+    return client.get(path)
+
+  with app.app_context():
+    engine = db.engine
+    ctx = context(db, venue_table, artist_table)
+  event.listen(engine, 'after_cursor_execute', count)
+  streaming = app.config['STREAM_LISTINGS']
+  export_token = app.config['EXPORT_TOKEN']
+  app.config['EXPORT_TOKEN'] = export_token or 'bench'
+  client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + app.config['EXPORT_TOKEN']
+  results = {}
+  try:
+    for name, method, path, body in ROUTES:
+      if only and name not in only:
+        continue
+      app.config['STREAM_LISTINGS'] = name.endswith('_stream')
+      timings = []
+      counts = []
+      statuses = set()
+      for i in range(warmup + repeat + 1):
+        if method != 'GET' or 'deletable' in path:
+          with app.app_context():
+            ctx = context(db, venue_table, artist_table)
+        data = body(ctx, i) if callable(body) else body
+        queries['count'] = 0
+        traced = i == warmup + repeat
+        if traced:
+          tracemalloc.start()
+        start = time.perf_counter()
+        response = request(method, path.format(**ctx), data)
+        response.get_data()
+        response.close()
+        elapsed = time.perf_counter() - start
+        if traced:
+          peak = tracemalloc.get_traced_memory()[1]
+          tracemalloc.stop()
+        elif i >= warmup:
+          timings.append(elapsed * 1000)
+          counts.append(queries['count'])
+        statuses.add(response.status_code)
+      results[name] = {
+        'p50_ms': round(_percentile(timings, 0.5), 3),
+        'p95_ms': round(_percentile(timings, 0.95), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries': max(counts),
+        'peak_kib': round(peak / 1024, 1),
+        'status': sorted(statuses),
+      }
+      echo('%-20s %9.2f ms p50 %9.2f ms p95 %4d queries %9.1f KiB  %s' % (
+        name, results[name]['p50_ms'], results[name]['p95_ms'], results[name]['queries'],
+        results[name]['peak_kib'], ','.join(str(s) for s in sorted(statuses))))
+  finally:
+    event.remove(engine, 'after_cursor_execute', count)
+    app.config['STREAM_LISTINGS'] = streaming
+    app.config['EXPORT_TOKEN'] = export_token
+  return results
+
+def compare(results, baseline, tolerance=0.25, min_ms=1.0):
+  # regressions against a saved run: slower p50 (beyond tolerance and
+  # min_ms), more queries, more memory, or a server error
+  regressions = []
+  for name, result in results.items():
+    if any(status >= 500 for status in result['status']):
+      regressions.append('%s: status %s' % (name, result['status']))
+    before = baseline.get(name)
+    if before is None:
+      continue
+    if result['p50_ms'] > before['p50_ms'] * (1 + tolerance) and result['p50_ms'] - before['p50_ms'] > min_ms:
+      regressions.append('%s: p50 %.2f ms, baseline %.2f ms' % (name, result['p50_ms'], before['p50_ms']))
+    if result['queries'] > before['queries']:
+      regressions.append('%s: %d queries, baseline %d' % (name, result['queries'], before['queries']))
+    if result['peak_kib'] > before['peak_kib'] * (1 + tolerance):
+      regressions.append('%s: peak %.1f KiB, baseline %.1f KiB' % (name, result['peak_kib'], before['peak_kib']))
+  return regressions
+
+def load(path):
+  with open(path) as f:
+    return json.load(f)
+
+def save(path, results):
+  with open(path, 'w') as f:
+    json.dump(results, f, indent=2, sort_keys=True)
+
+# modules create_app() leaves to the routes and commands needing them
+LAZY_MODULES = ['alembic', 'babel', 'dateutil', 'flask_migrate', 'flask_wtf', 'wtforms']
+
+STARTUP_SCRIPT = """
+import json, sys, time
+began = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+loaded = [name for name in sys.argv[2:] if name in sys.modules]
+client = application.test_client()
+requests = []
+for _ in range(2):
+    start = time.perf_counter()
+    response = client.get(sys.argv[1])
+    response.get_data()
+    response.close()
+    requests.append(time.perf_counter() - start)
+print(json.dumps({
+    'import_ms': (imported - began) * 1000, 'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': requests[0] * 1000, 'second_request_ms': requests[1] * 1000,
+    'status': response.status_code, 'loaded_at_startup': loaded,
+    'loaded_after_request': [name for name in sys.argv[2:] if name in sys.modules],
+}))
+"""
+
+def startup(path='/venues', repeat=5, cwd=None):
+  # medians over `repeat` fresh processes; process_ms includes the
+  # interpreter's own startup
+  runs = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    output = subprocess.run(
+      [sys.executable, '-c', STARTUP_SCRIPT, path] + LAZY_MODULES,
+      cwd=cwd or os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+    ).stdout
+    run = json.loads(output.strip().splitlines()[-1])
+    run['process_ms'] = (time.perf_counter() - start) * 1000
+    runs.append(run)
+  result = {key: round(statistics.median(run[key] for run in runs), 1) for key in (
+    'process_ms', 'import_ms', 'create_app_ms', 'first_request_ms', 'second_request_ms')}
+  result.update(path=path, status=runs[-1]['status'], loaded_at_startup=runs[-1]['loaded_at_startup'],
+                loaded_after_request=runs[-1]['loaded_after_request'])
+  return result
+
+def detailPages(app, paths, requests=400, concurrency=8):
+  # p50/p95 and throughput of `requests` detail pages spread over
+  # `concurrency` threads, sync then async; the page cache should be off
+  results = {}
+  for mode in ('sync', 'async'):
+    app.config['ASYNC_DETAIL_PAGES'] = mode == 'async'
+
+    def fetch(numbers):
+      client = app.test_client()
+      timings, statuses = [], set()
+      for n in numbers:
+        start = time.perf_counter()
+        response = client.get(paths[n % len(paths)])
+        response.get_data()
+        response.close()
+        timings.append((time.perf_counter() - start) * 1000)
+        statuses.add(response.status_code)
+      return timings, statuses
+
+    # warm the pools (and the async loop) before timing
+    fetch(range(concurrency))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+      runs = list(pool.map(fetch, [range(i, requests, concurrency) for i in range(concurrency)]))
+    elapsed = time.perf_counter() - start
+    timings = [t for run in runs for t in run[0]]
+    results[mode] = {
+      'p50_ms': round(_percentile(timings, 0.5), 3),
+      'p95_ms': round(_percentile(timings, 0.95), 3),
+      'rps': round(len(timings) / elapsed, 1),
+      'status': sorted(set().union(*[run[1] for run in runs])),
+    }
+  return results
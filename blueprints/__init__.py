@@ -0,0 +1,3 @@
+#----------------------------------------------------------------------------#
+# Route blueprints, registered on the app by create_app() (app.py).
+#----------------------------------------------------------------------------#
@@ -0,0 +1,180 @@
+#----------------------------------------------------------------------------#
+# API.
+#----------------------------------------------------------------------------#
+
+# Read-only JSON mirror of the listing and detail pages under /api/v1.
+# ?fields=id,name selects the returned fields (sparse fieldsets) and only
+# those columns are queried; listings are keyset paginated with ?after= and
+# ?limit=. Responses carry the same validators as the HTML pages.
+
+from datetime import datetime
+
+from flask import Blueprint, current_app, request, abort
+
+from catalog import genreFilter, genreNames, scheduleShows, showTimeline, expireShowCounters
+from helpers import keysetPage, entityValidators, listingValidators, notModified, withValidators, jsonResponse
+from db_routing import readReplica
+from instrumentation import queryBudget
+from models import db, Show, Venue, Artist
+
+bp = Blueprint('api', __name__)
+
+API_VENUE_FIELDS = {
+  'id': Venue.id, 'name': Venue.name, 'city': Venue.city, 'state': Venue.state,
+  'address': Venue.address, 'phone': Venue.phone, 'genres': None,
+  'image_link': Venue.image_link, 'facebook_link': Venue.facebook_link, 'website': Venue.website,
+  'seeking_talent': Venue.seeking_talent, 'seeking_description': Venue.seeking_description,
+  'upcoming_shows_count': Venue.upcoming_shows_count, 'past_shows_count': Venue.past_shows_count
+}
+API_ARTIST_FIELDS = {
+  'id': Artist.id, 'name': Artist.name, 'city': Artist.city, 'state': Artist.state,
+  'phone': Artist.phone, 'genres': None, 'image_link': Artist.image_link,
+  'facebook_link': Artist.facebook_link, 'website': Artist.website,
+  'seeking_venue': Artist.seeking_venue, 'seeking_description': Artist.seeking_description,
+  'upcoming_shows_count': Artist.upcoming_shows_count, 'past_shows_count': Artist.past_shows_count
+}
+API_SHOW_FIELDS = {
+  'venue_id': Show.c.venue_id, 'venue_name': Venue.name, 'venue_image_link': Venue.image_link,
+  'artist_id': Show.c.artist_id, 'artist_name': Artist.name, 'artist_image_link': Artist.image_link,
+  'start_time': Show.c.start_time
+}
+# 'genres' (None above) is read from the genre tables for all rows at once
+# fields of the detail endpoints computed from the show timeline
+API_TIMELINE_FIELDS = ['past_shows', 'upcoming_shows']
+
+
+def apiError(status, message):
+  abort(jsonResponse({'error': message}, status))
+
+def apiFields(available, default):
+  fields = request.args.get('fields')
+  fields = fields.split(',') if fields else default
+  for field in fields:
+    if field not in available:
+      apiError(400, 'unknown field: %s' % field)
+  return fields
+
+def apiValue(field, value):
+  if isinstance(value, datetime):
+    return value.isoformat()
+  return value
+
+def apiRow(fields, row):
+  return {field: apiValue(field, value) for field, value in zip(fields, row)}
+
+def apiPageSize():
+  try:
+    limit = int(request.args.get('limit', current_app.config['PAGE_SIZE']))
+  except ValueError:
+    apiError(400, 'limit must be an integer')
+  return max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+
+def apiList(name, model, available, default):
+  # upcoming_shows_count: shows that started since the last refresh move to past
+  expireShowCounters(model, datetime.now())
+  etag, last_modified = listingValidators('api-' + name, model.__table__)
+  not_modified = notModified(etag, last_modified, listing=True)
+  if not_modified:
+    return not_modified
+  fields = apiFields(available, default)
+  columns = [f for f in fields if available[f] is not None]
+  query = db.session.query(*[available[f] for f in columns], model.id)
+  if request.args.get('genre'):
+    query = query.filter(genreFilter(model, request.args['genre']))
+  # the sort key is selected last and stripped from the output
+  rows, next_cursor = keysetPage(query, [model.id], lambda row: [row[-1]], [int], apiPageSize())
+  data = [apiRow(columns, row) for row in rows]
+  if 'genres' in fields:
+    names = genreNames(model, [row[-1] for row in rows])
+    for item, row in zip(data, rows):
+      item['genres'] = names[row[-1]]
+  payload = {'data': [{f: item[f] for f in fields} for item in data], 'next_cursor': next_cursor}
+  return withValidators(jsonResponse(payload), etag, last_modified)
+
+def apiDetail(name, model, available, entity_id):
+  etag, last_modified = entityValidators(model, entity_id)
+  not_modified = notModified(etag, last_modified)
+  if not_modified:
+    return not_modified
+  fields = apiFields(list(available) + API_TIMELINE_FIELDS, list(available))
+  columns = [f for f in fields if available.get(f) is not None]
+  payload = {}
+  if len(columns) > 0:
+    row = db.session.query(*[available[f] for f in columns]).filter(model.id == entity_id).one()
+    payload = apiRow(columns, row)
+  if 'genres' in fields:
+    payload['genres'] = genreNames(model, [entity_id])[entity_id]
+  if any(f in API_TIMELINE_FIELDS for f in fields):
+    timeline = showTimeline(datetime.now(), entity_id, name)
+    for field in API_TIMELINE_FIELDS:
+      if field in fields:
+        payload[field] = [{k: apiValue(k, v) for k, v in show.items()} for show in timeline[field + '_list']]
+  return withValidators(jsonResponse(payload), etag, last_modified)
+
+@bp.route('/api/v1/venues')
+@queryBudget(7)  # 4, or 7 refreshing expired show counters
+@readReplica
+def api_venues():
+  return apiList('venues', Venue, API_VENUE_FIELDS, ['id', 'name', 'city', 'state'])
+
+@bp.route('/api/v1/venues/<int:venue_id>')
+@queryBudget(8)  # 4, or 8 refreshing expired show counters
+@readReplica
+def api_venue(venue_id):
+  return apiDetail('venue', Venue, API_VENUE_FIELDS, venue_id)
+
+@bp.route('/api/v1/artists')
+@queryBudget(7)  # 4, or 7 refreshing expired show counters
+@readReplica
+def api_artists():
+  return apiList('artists', Artist, API_ARTIST_FIELDS, ['id', 'name'])
+
+@bp.route('/api/v1/artists/<int:artist_id>')
+@queryBudget(8)  # 4, or 8 refreshing expired show counters
+@readReplica
+def api_artist(artist_id):
+  return apiDetail('artist', Artist, API_ARTIST_FIELDS, artist_id)
+
+# Batch scheduling: {"shows": [{"artist_id", "venue_id", "start_time"}, ...]}
+# (or the bare list), answered with a result per show
+@bp.route('/api/v1/shows', methods=['POST'])
+@queryBudget(8)
+def api_schedule_shows():
+  payload = request.get_json(silent=True)
+  shows = payload.get('shows') if isinstance(payload, dict) else payload
+  if not isinstance(shows, list):
+    apiError(400, 'expected a list of shows')
+  if len(shows) > current_app.config['API_MAX_SCHEDULE_SHOWS']:
+    apiError(400, 'at most %d shows per request' % current_app.config['API_MAX_SCHEDULE_SHOWS'])
+  results = scheduleShows(shows)
+  counts = {status: sum(1 for r in results if r['status'] == status) for status in ('created', 'duplicate', 'invalid')}
+  return jsonResponse(dict(counts, results=results))
+
+@bp.route('/api/v1/shows')
+@queryBudget(2)
+@readReplica
+def api_shows():
+  etag, last_modified = listingValidators('api-shows', Show, Venue.__table__, Artist.__table__)
+  not_modified = notModified(etag, last_modified, listing=True)
+  if not_modified:
+    return not_modified
+  fields = apiFields(API_SHOW_FIELDS, list(API_SHOW_FIELDS))
+  sort_key = [Show.c.start_time, Show.c.artist_id, Show.c.venue_id]
+  query = db.session.query(*[API_SHOW_FIELDS[f] for f in fields], *sort_key).select_from(Show)
+  # join the venue and artist tables only when one of their fields is asked for
+  if any(f.startswith('venue_') and f != 'venue_id' for f in fields):
+    query = query.join(Venue, Venue.id == Show.c.venue_id)
+  if any(f.startswith('artist_') and f != 'artist_id' for f in fields):
+    query = query.join(Artist, Artist.id == Show.c.artist_id)
+  rows, next_cursor = keysetPage(
+    query, sort_key, lambda row: list(row[-3:]), [datetime.fromisoformat, int, int], apiPageSize()
+  )
+  payload = {'data': [apiRow(fields, row) for row in rows], 'next_cursor': next_cursor}
+  return withValidators(jsonResponse(payload), etag, last_modified)
+
+# Connection pool statistics of this worker process, for sizing the pool
+# (DB_PROFILE and the DB_* overrides in config.py)
+@bp.route('/api/v1/pool')
+def api_pool():
+  replicas = {key: stats.snapshot() for key, stats in current_app.extensions['replica_pool_stats'].items()}
+  return jsonResponse(dict(current_app.extensions['pool_stats'].snapshot(), profile=current_app.config['DB_PROFILE'], replicas=replicas))
@@ -0,0 +1,225 @@
+#----------------------------------------------------------------------------#
+# Artist pages: listing, search, detail, create and edit.
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for
+
+from catalog import (
+  searchIndex, searchIndexes, genreFilter, genresByName, showTimeline, fetchDetail, expireShowCounters,
+  touchEntities, cachedPage, cachePage
+)
+from helpers import (
+  keysetPage, streamListing, streamRows, streamTemplate, entityValidators, listingValidators,
+  notModified, withValidators
+)
+from db_routing import readReplica
+from instrumentation import queryBudget
+from models import db, utcNow, Show, Venue, Artist
+
+bp = Blueprint('artists', __name__)
+
+#  Artists
+#  ----------------------------------------------------------------
+@bp.route('/artists')
+@queryBudget(2)
+@readReplica
+def artists():
+  # TODO: replace with real data returned from querying the database
+  etag, last_modified = listingValidators('artists', Artist.__table__)
+  not_modified = notModified(etag, last_modified, listing=True)
+  if not_modified:
+    return not_modified
+  artist_query = Artist.query
+  if request.args.get('genre'):
+    artist_query = artist_query.filter(genreFilter(Artist, request.args['genre']))
+  if streamListing():
+    rows = streamRows(artist_query.with_entities(Artist.id, Artist.name).order_by(Artist.id))
+    artist_rows = ({'id': artist_id, 'name': name} for artist_id, name in rows)
+    return withValidators(streamTemplate('pages/artists.html', artists=artist_rows, next_cursor=None), etag, last_modified)
+  artist_list, next_cursor = keysetPage(artist_query, [Artist.id], lambda a: [a.id], [int])
+  try:
+    data = []
+    for item in artist_list:
+      data.append({
+        'id': item.id,
+        'name': item.name
+      })
+  except:
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  return withValidators(render_template('pages/artists.html', artists=data, next_cursor=next_cursor), etag, last_modified)
+
+@bp.route('/artists/search', methods=['POST'])
+@queryBudget(5)  # 2, or 5 refreshing expired show counters
+@readReplica
+def search_artists():
+  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+  # search for "band" should return "The Wild Sax Band".
+  search_term = request.form.get('search_term', '')
+  genre = request.form.get('genre', '')
+  # the in-memory index does not know genres
+  index = searchIndex(Artist) if not genre else None
+  # the index keeps the upcoming counts too, refreshed along with the rows
+  expireShowCounters(Artist, datetime.now())
+  if index:
+    list_data = index.search(search_term, current_app.config['SEARCH_RESULTS_LIMIT'])
+    return render_template('pages/search_artists.html', results={"count": len(list_data), "data": list_data}, search_term=search_term)
+  # case-insensitive substring match in the database (pg_trgm index on PostgreSQL)
+  artist_query = Artist.query.filter(Artist.name.icontains(search_term, autoescape=True))
+  if genre:
+    artist_query = artist_query.filter(genreFilter(Artist, genre))
+  artists = artist_query.order_by(Artist.name).limit(current_app.config['SEARCH_RESULTS_LIMIT']).all()
+  list_data = []
+  for artist in artists:
+    list_data.append({
+      "id": artist.id,
+      "name": artist.name,
+      "num_upcoming_shows": artist.upcoming_shows_count
+    })
+
+  response={
+    "count": len(list_data),
+    "data": list_data
+  }
+  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+
+@bp.route('/artists/<int:artist_id>')
+@queryBudget(8)  # 4, or 8 refreshing expired show counters
+@readReplica
+def show_artist(artist_id):
+  # shows the artist page with the given artist_id
+  # TODO: replace with real artist data from the artist table, using artist_id
+  etag, last_modified = entityValidators(Artist, artist_id)
+  not_modified = notModified(etag, last_modified)
+  if not_modified:
+    return not_modified
+  html = cachedPage('artist:%d:%s' % (artist_id, etag))
+  if html is not None:
+    return withValidators(html, etag, last_modified)
+  if current_app.config['ASYNC_DETAIL_PAGES']:
+    # row, genres and shows fetched concurrently (async_db.py)
+    artist, genres, timeline = fetchDetail(Artist, artist_id, datetime.now())
+  else:
+    artist = Artist.query.filter_by(id = artist_id).all()[0]
+    genres = [genre.name for genre in artist.genres]
+    timeline = showTimeline(datetime.now(), artist.id, 'artist')
+  data={
+    "id": artist.id,
+    "name": artist.name,
+    "genres": genres,
+    "city": artist.city,
+    "state": artist.state,
+    "phone": artist.phone,
+    "website": artist.website,
+    "facebook_link": artist.facebook_link,
+    "seeking_venue": artist.seeking_venue,
+    "seeking_description": artist.seeking_description,
+    "image_link": artist.image_link,
+    "past_shows": timeline["past_shows_list"],
+    "upcoming_shows": timeline["upcoming_shows_list"],
+    "past_shows_count": timeline["past_shows"],
+    "upcoming_shows_count": timeline["upcoming_shows"],
+  }
+  return withValidators(cachePage('artist:%d:%s' % (artist_id, etag), render_template('pages/show_artist.html', artist=data)), etag, last_modified)
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+  from forms import ArtistForm
+  form = ArtistForm()
+  edit_artist = Artist.query.filter_by(id = artist_id).all()[0]
+  artist={
+    "id": edit_artist.id,
+    "name": edit_artist.name,
+    "genres": [genre.name for genre in edit_artist.genres],
+    "city": edit_artist.city,
+    "state": edit_artist.state,
+    "phone": edit_artist.phone,
+    "website": edit_artist.website,
+    "facebook_link": edit_artist.facebook_link,
+    "seeking_venue": edit_artist.seeking_venue,
+    "seeking_description":  edit_artist.seeking_description,
+    "image_link": edit_artist.image_link
+  }
+  # TODO: populate form with fields from artist with ID <artist_id>
+  form = ArtistForm(
+    name = artist["name"], genres = artist["genres"], city = artist["city"],
+    state = artist["state"], phone = artist["phone"], website_link = artist["website"],
+    facebook_link = artist["facebook_link"], seeking_venue = artist["seeking_venue"],
+    seeking_description = artist["seeking_description"], image_link = artist["image_link"]
+  )
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  from forms import ArtistForm
+  # TODO: take values from the form submitted, and update existing
+  # artist record with ID <artist_id> using the new attributes
+  try:
+    submit_form = ArtistForm(request.form)
+    edit_data = Artist.query.get(artist_id)
+    edit_data.name = submit_form.name.data
+    edit_data.genres = genresByName(submit_form.genres.data)
+    # the genres live in their own table: the row itself may not change
+    edit_data.updated_at = utcNow()
+    edit_data.city = submit_form.city.data
+    edit_data.state = submit_form.state.data
+    edit_data.phone = submit_form.phone.data
+    edit_data.website = submit_form.website_link.data
+    edit_data.facebook_link = submit_form.facebook_link.data
+    edit_data.seeking_venue = submit_form.seeking_venue.data
+    edit_data.seeking_description = submit_form.seeking_description.data
+    edit_data.image_link = submit_form.image_link.data
+    venue_ids = [row[0] for row in db.session.query(Show.c.venue_id).filter_by(artist_id = artist_id)]
+    touchEntities(Venue, venue_ids)
+    db.session.commit()
+    searchIndexes()[Artist].rename(artist_id, submit_form.name.data)
+  except:
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  from forms import ArtistForm
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+  from forms import ArtistForm
+  # called upon submitting the new artist listing form
+  # TODO: insert form data as a new Artist record in the db, instead
+  try:
+    form = ArtistForm(request.form)
+    data = Artist(
+      name = form.name.data, city = form.city.data, state = form.state.data, phone = form.phone.data,
+      genres = genresByName(form.genres.data), image_link = form.image_link.data, facebook_link = form.facebook_link.data,
+      website = form.website_link.data, seeking_description = form.seeking_description.data, seeking_venue = form.seeking_venue.data
+    )
+  except:
+    # on unsuccessful db insert, flash an error instead.
+    flash('An error occurred. Artist ' + data.name + ' could not be listed.')
+    print(sys.exc_info())
+  else:
+    # on successful db insert, flash success
+    flash('Artist ' + request.form['name'] + ' was successfully listed!')
+    db.session.add(data)
+    db.session.commit()
+    searchIndexes()[Artist].add(data.id, data.name)
+    db.session.close()
+  # TODO: modify data to be the data object returned from db insertion
+
+  return render_template('pages/home.html')
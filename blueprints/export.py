@@ -0,0 +1,52 @@
+#----------------------------------------------------------------------------#
+# Streamed catalog dumps (CSV or NDJSON, optionally gzipped).
+#----------------------------------------------------------------------------#
+
+import hmac
+
+from flask import Blueprint, current_app, request, Response, abort, stream_with_context
+
+import bulk_export
+from catalog import exportQuery
+from db_routing import readReplica
+from instrumentation import queryBudget
+
+bp = Blueprint('export', __name__)
+
+def exportDate(value):
+  if not value:
+    return None
+  import dateutil.parser
+  try:
+    return dateutil.parser.parse(value)
+  except (ValueError, OverflowError):
+    abort(400)
+
+# The dumps are the whole catalog: off unless EXPORT_TOKEN is set, and then
+# only for requests carrying it (Authorization: Bearer <token>)
+def exportAllowed():
+  token = current_app.config['EXPORT_TOKEN']
+  if not token:
+    abort(404)
+  if not hmac.compare_digest(request.headers.get('Authorization', ''), 'Bearer ' + token):
+    abort(403)
+
+@bp.route('/export/<any(venues, artists, shows):kind>')
+@queryBudget(1)
+@readReplica
+def export_catalog(kind):
+  exportAllowed()
+  fmt = request.args.get('format', 'csv')
+  if fmt not in bulk_export.FORMATS:
+    abort(400)
+  compress = request.args.get('gzip') == '1'
+  columns, query = exportQuery(
+    kind, request.args.get('state'), exportDate(request.args.get('from')), exportDate(request.args.get('to'))
+  )
+  filename = '%s.%s%s' % (kind, fmt, '.gz' if compress else '')
+  chunks = bulk_export.export(columns, query, fmt, compress, current_app.config['STREAM_BATCH_ROWS'])
+  return Response(
+    stream_with_context(chunks),
+    mimetype='application/gzip' if compress else ('text/csv' if fmt == 'csv' else 'application/x-ndjson'),
+    headers={'Content-Disposition': 'attachment; filename=%s' % filename}
+  )
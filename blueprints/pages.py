@@ -0,0 +1,30 @@
+#----------------------------------------------------------------------------#
+# Home page and error pages.
+#----------------------------------------------------------------------------#
+
+from flask import Blueprint, render_template, request
+
+from helpers import jsonResponse
+
+bp = Blueprint('pages', __name__)
+
+@bp.route('/')
+def index():
+  return render_template('pages/home.html')
+
+# Function to errorhandler
+@bp.app_errorhandler(400)
+def bad_request_error(error):
+    if request.path.startswith('/api/'):
+        return jsonResponse({'error': 'bad request'}, 400)
+    return error
+
+@bp.app_errorhandler(404)
+def not_found_error(error):
+    if request.path.startswith('/api/'):
+        return jsonResponse({'error': 'not found'}, 404)
+    return render_template('errors/404.html'), 404
+
+@bp.app_errorhandler(500)
+def server_error(error):
+    return render_template('errors/500.html'), 500
@@ -0,0 +1,109 @@
+#----------------------------------------------------------------------------#
+# Show listing and the show form.
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, flash
+
+from catalog import scheduleShows, cachedPage, cachePage
+from helpers import keysetPage, streamListing, streamRows, streamTemplate, listingValidators, notModified, withValidators
+from db_routing import readReplica
+from instrumentation import queryBudget
+from models import db, Show, Venue, Artist
+
+bp = Blueprint('shows', __name__)
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@bp.route('/shows')
+@queryBudget(2)
+@readReplica
+def shows():
+  # displays list of shows at /shows
+  # TODO: replace with real venues data.
+  etag, last_modified = listingValidators('shows', Show, Venue.__table__, Artist.__table__)
+  not_modified = notModified(etag, last_modified, listing=True)
+  if not_modified:
+    return not_modified
+  if streamListing():
+    rows = streamRows(db.session.query(
+      Show.c.venue_id, Venue.name, Show.c.artist_id, Artist.name, Artist.image_link, Show.c.start_time
+    ).join(Venue, Venue.id == Show.c.venue_id).join(Artist, Artist.id == Show.c.artist_id)
+     .order_by(Show.c.start_time, Show.c.artist_id, Show.c.venue_id))
+    show_rows = ({
+      "venue_id": venue_id,
+      "venue_name": venue_name,
+      "artist_id": artist_id,
+      "artist_name": artist_name,
+      "artist_image_link": artist_image_link,
+      "start_time": start_time
+    } for venue_id, venue_name, artist_id, artist_name, artist_image_link, start_time in rows)
+    return withValidators(streamTemplate('pages/shows.html', shows=show_rows, next_cursor=None), etag, last_modified)
+  page_key = 'shows:%s:%s' % (etag, request.args.get('after', ''))
+  html = cachedPage(page_key)
+  if html is not None:
+    return withValidators(html, etag, last_modified)
+  # one JOIN across show, Venue and Artist, fetching only the displayed columns
+  shows_list, next_cursor = keysetPage(
+    db.session.query(
+      Show.c.venue_id, Venue.name, Show.c.artist_id, Artist.name, Artist.image_link, Show.c.start_time
+    ).join(Venue, Venue.id == Show.c.venue_id).join(Artist, Artist.id == Show.c.artist_id),
+    [Show.c.start_time, Show.c.artist_id, Show.c.venue_id],
+    lambda show: [show[5], show[2], show[0]],
+    cursor_types=[datetime.fromisoformat, int, int]
+  )
+  # Process the shows_list and construct the data
+  data = []
+  for venue_id, venue_name, artist_id, artist_name, artist_image_link, start_time in shows_list:
+    data.append({
+      "venue_id": venue_id,
+      "venue_name": venue_name,
+      "artist_id": artist_id,
+      "artist_name": artist_name,
+      "artist_image_link": artist_image_link,
+      "start_time": start_time
+    })
+  # Close the session
+  db.session.close()
+  return withValidators(cachePage(page_key, render_template('pages/shows.html', shows=data, next_cursor=next_cursor)), etag, last_modified)
+
+@bp.route('/shows/create')
+def create_shows():
+  from forms import ShowForm
+  # renders form. do not touch.
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+@bp.route('/shows/create', methods=['POST'])
+@queryBudget(8)
+def create_show_submission():
+  # called to create new shows in the db, upon submitting new show listing form
+  # TODO: insert form data as a new Show record in the db, instead
+  # on successful db insert, flash success
+  try:
+    showInfo = {
+      'artist_id': request.form.get('artist_id'),
+      'venue_id': request.form.get('venue_id'),
+      'start_time': request.form.get('start_time')
+    }
+  except:
+    print(sys.exc_info())
+    flash('An error occurred. Show could not be listed.')
+  else:
+    if len(showInfo["venue_id"] or '') == 0 and len(showInfo["artist_id"] or '') == 0:
+      flash('You must enter Artist ID and Venue ID')
+    else:
+      result = scheduleShows([showInfo])[0]
+      if result['status'] == 'created':
+        flash('Show was successfully listed!')
+      elif result['status'] == 'duplicate':
+        flash('already exists!')
+      elif all(errors[0].endswith('does not exist') for errors in result['errors'].values()):
+        flash('Artist ID or Venue ID does not exist in table, please check again')
+      else:
+        flash('Incorrect format, please enter the following format: YYYY-MM-DD HH:MM:SS')
+    db.session.close()
+  return render_template('pages/home.html')
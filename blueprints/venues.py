@@ -0,0 +1,295 @@
+#----------------------------------------------------------------------------#
+# Venue pages: listing, search, detail, create, edit and delete.
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+from itertools import groupby
+
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for
+from sqlalchemy import func, tuple_
+
+from catalog import (
+  searchIndex, searchIndexes, genreFilter, genresByName, showTimeline, fetchDetail, refreshShowCounters,
+  expireShowCounters, touchEntities, cachedPage, cachePage
+)
+from helpers import (
+  keysetPage, streamListing, streamRows, streamTemplate, entityValidators, listingValidators,
+  notModified, withValidators
+)
+from db_routing import readReplica
+from instrumentation import queryBudget
+from models import db, utcNow, Show, Venue, Artist
+
+bp = Blueprint('venues', __name__)
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@bp.route('/venues')
+@queryBudget(7)  # 4, or 7 refreshing expired show counters
+@readReplica
+def venues():
+  # TODO: replace with real venues data.
+  # num_upcoming_shows should be aggregated based on number of upcoming shows per venue.
+  expireShowCounters(Venue, datetime.now())
+  etag, last_modified = listingValidators('venues', Venue.__table__)
+  not_modified = notModified(etag, last_modified, listing=True)
+  if not_modified:
+    return not_modified
+  area_count = func.count(Venue.id)
+  if request.args.get('areas') == '1':
+    # collapsed view for large catalogs: one GROUP BY row per area, the
+    # venues of an area are listed on demand through ?city=&state=
+    area_query = db.session.query(Venue.city, Venue.state, area_count)
+    if request.args.get('genre'):
+      area_query = area_query.filter(genreFilter(Venue, request.args['genre']))
+    area_list, next_cursor = keysetPage(
+      area_query.group_by(Venue.city, Venue.state),
+      [Venue.city, Venue.state], lambda a: [a[0], a[1]], [str, str]
+    )
+    categories = [{'city': city, 'state': state, 'num_venues': num_venues, 'venues': None}
+      for city, state, num_venues in area_list]
+    return withValidators(render_template('pages/venues.html', areas=categories, next_cursor=next_cursor), etag, last_modified)
+
+  venue_query = Venue.query
+  if request.args.get('city') is not None and request.args.get('state') is not None:
+    venue_query = venue_query.filter_by(city = request.args['city'], state = request.args['state'])
+  if request.args.get('genre'):
+    venue_query = venue_query.filter(genreFilter(Venue, request.args['genre']))
+  if streamListing():
+    rows = streamRows(venue_query.with_entities(
+      Venue.id, Venue.name, Venue.city, Venue.state, Venue.upcoming_shows_count
+    ).order_by(Venue.city, Venue.state, Venue.id))
+    areas = ({
+      'city': city,
+      'state': state,
+      'venues': ({'id': v.id, 'name': v.name, 'num_upcoming_shows': v.upcoming_shows_count} for v in items)
+    } for (city, state), items in groupby(rows, key=lambda v: (v.city, v.state)))
+    return withValidators(streamTemplate('pages/venues.html', areas=areas, next_cursor=None), etag, last_modified)
+  # ordered by city and state, so the areas are formed in a single pass
+  data_list, next_cursor = keysetPage(
+    venue_query, [Venue.city, Venue.state, Venue.id], lambda v: [v.city, v.state, v.id], [str, str, int]
+  )
+  categories = []
+  for (city, state), items in groupby(data_list, key=lambda v: (v.city, v.state)):
+    categories.append({
+      'city': city,
+      'state': state,
+      'venues': [{
+        'id': item.id,
+        'name': item.name,
+        'num_upcoming_shows': item.upcoming_shows_count
+      } for item in items]
+    })
+  # per-area venue counts of the areas on this page, under the same genre filter
+  if len(categories) > 0:
+    area_keys = [(c['city'], c['state']) for c in categories]
+    count_query = db.session.query(Venue.city, Venue.state, area_count) \
+      .filter(tuple_(Venue.city, Venue.state).in_(area_keys))
+    if request.args.get('genre'):
+      count_query = count_query.filter(genreFilter(Venue, request.args['genre']))
+    num_venues = dict(((city, state), count) for city, state, count in count_query.group_by(Venue.city, Venue.state))
+    for c in categories:
+      c['num_venues'] = num_venues.get((c['city'], c['state']), len(c['venues']))
+
+  return withValidators(render_template('pages/venues.html', areas=categories, next_cursor=next_cursor), etag, last_modified)
+
+@bp.route('/venues/search', methods=['POST'])
+@queryBudget(5)  # 2, or 5 refreshing expired show counters
+@readReplica
+def search_venues():
+  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for Hop should return "The Musical Hop".
+  # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+  search_term = request.form.get('search_term', '')
+  genre = request.form.get('genre', '')
+  # the in-memory index does not know genres
+  index = searchIndex(Venue) if not genre else None
+  # the index keeps the upcoming counts too, refreshed along with the rows
+  expireShowCounters(Venue, datetime.now())
+  if index:
+    data_list = index.search(search_term, current_app.config['SEARCH_RESULTS_LIMIT'])
+    return render_template('pages/search_venues.html', results={"count": len(data_list), "data": data_list}, search_term=search_term)
+  # case-insensitive substring match in the database (pg_trgm index on PostgreSQL)
+  venue_query = Venue.query.filter(Venue.name.icontains(search_term, autoescape=True))
+  if genre:
+    venue_query = venue_query.filter(genreFilter(Venue, genre))
+  venue_list = venue_query.order_by(Venue.name).limit(current_app.config['SEARCH_RESULTS_LIMIT']).all()
+  data_list = []
+  for venue in venue_list:
+    data_list.append({
+      "id": venue.id,
+      "name": venue.name,
+      "num_upcoming_shows": venue.upcoming_shows_count
+    })
+
+  response={
+    "count": len(data_list),
+    "data": data_list
+  }
+  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+
+@bp.route('/venues/<int:venue_id>')
+@queryBudget(8)  # 4, or 8 refreshing expired show counters
+@readReplica
+def show_venue(venue_id):
+  # shows the venue page with the given venue_id
+  # TODO: replace with real venue data from the venues table, using venue_id
+  etag, last_modified = entityValidators(Venue, venue_id)
+  not_modified = notModified(etag, last_modified)
+  if not_modified:
+    return not_modified
+  html = cachedPage('venue:%d:%s' % (venue_id, etag))
+  if html is not None:
+    return withValidators(html, etag, last_modified)
+  if current_app.config['ASYNC_DETAIL_PAGES']:
+    # row, genres and shows fetched concurrently (async_db.py)
+    venue, genres, timeline = fetchDetail(Venue, venue_id, datetime.now())
+  else:
+    venue = Venue.query.filter_by(id = venue_id).all()[0]
+    genres = [genre.name for genre in venue.genres]
+    timeline = showTimeline(datetime.now(), venue.id, 'venue')
+  data={
+    "id": venue.id,
+    "name": venue.name,
+    "genres": genres,
+    "address": venue.address,
+    "city": venue.city,
+    "state": venue.state,
+    "phone": venue.phone,
+    "website": venue.website,
+    "facebook_link": venue.facebook_link,
+    "seeking_talent": venue.seeking_talent,
+    "seeking_description": venue.seeking_description,
+    "image_link": venue.image_link,
+    "past_shows": timeline["past_shows_list"],
+    "upcoming_shows": timeline["upcoming_shows_list"],
+    "past_shows_count": timeline["past_shows"],
+    "upcoming_shows_count": timeline["upcoming_shows"],
+  }
+  return withValidators(cachePage('venue:%d:%s' % (venue_id, etag), render_template('pages/show_venue.html', venue=data)), etag, last_modified)
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  from forms import VenueForm
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  from forms import VenueForm
+  # TODO: insert form data as a new Venue record in the db, instead
+  try:
+    form = VenueForm(request.form)
+    data = Venue(
+      # city and state are NOT NULL (the /venues sort key)
+      name = form.name.data, city = form.city.data or '',
+      state = form.state.data or '', address = form.address.data, phone = form.phone.data,
+      genres = genresByName(form.genres.data), image_link = form.image_link.data, facebook_link = form.facebook_link.data,
+      website = form.website_link.data, seeking_description = form.seeking_description.data, seeking_talent = form.seeking_talent.data
+    )
+  except:
+    # on unsuccessful db insert, flash an error instead.
+    flash('An error occurred. Venue ' + data.name + ' could not be listed.')
+    print(sys.exc_info())
+  else:
+    # on successful db insert, flash success
+    flash('Venue ' + request.form['name'] + ' was successfully listed!')
+    db.session.add(data)
+    db.session.commit()
+    searchIndexes()[Venue].add(data.id, data.name)
+    db.session.close()
+  # TODO: modify data to be the data object returned from db insertion
+  return render_template('pages/home.html')
+
+@bp.route('/venues/<int:venue_id>/delete', methods=['DELETE','POST','GET'])
+# @app.route('/artists/<int:artist_id>')
+def delete_venue(venue_id):
+  print("venue_id", venue_id)
+  # TODO: Complete this endpoint for taking a venue_id, and using
+  # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+  try:
+      data_delete_id = venue_id
+      venue = Venue.query.get(venue_id)
+      # artists that played here lose these shows from their counters
+      artist_ids = [row[0] for row in db.session.query(Show.c.artist_id).filter_by(venue_id = data_delete_id)]
+      # the shows first: their foreign keys hold the venue row
+      db.session.query(Show).filter_by(venue_id = data_delete_id).delete()
+      db.session.delete(venue)
+      refreshShowCounters(Artist, artist_ids, datetime.now())
+      db.session.commit()
+      searchIndexes()[Venue].remove(venue_id)
+      flash('Venue ' + str(venue_id) + ' was successfully removed!')
+  except():
+    print(sys.exc_info())
+    db.session.rollback()
+  finally:
+      db.session.close()
+
+  # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
+  return redirect('/')
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+  from forms import VenueForm
+  form = VenueForm()
+  edit_venue = Venue.query.filter_by(id = venue_id).all()[0]
+  venue={
+    "id": edit_venue.id,
+    "name": edit_venue.name,
+    "genres": [genre.name for genre in edit_venue.genres],
+    "address": edit_venue.address,
+    "city": edit_venue.city,
+    "state": edit_venue.state,
+    "phone": edit_venue.phone,
+    "website": edit_venue.website,
+    "facebook_link": edit_venue.facebook_link,
+    "seeking_talent": edit_venue.seeking_talent,
+    "seeking_description":  edit_venue.seeking_description,
+    "image_link": edit_venue.image_link
+  }
+  # TODO: populate form with values from venue with ID <venue_id>
+  form = VenueForm(
+    name = venue["name"], genres = venue["genres"], address = venue["address"], city = venue["city"],
+    state = venue["state"], phone = venue["phone"], website_link = venue["website"],
+    facebook_link = venue["facebook_link"], seeking_talent = venue["seeking_talent"], 
+    seeking_description = venue["seeking_description"], image_link = venue["image_link"]
+  )
+  return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  from forms import VenueForm
+  # TODO: take values from the form submitted, and update existing
+  # venue record with ID <venue_id> using the new attributes
+  try:
+    submit_form = VenueForm(request.form)
+    edit_data = Venue.query.get(venue_id)
+    edit_data.name = submit_form.name.data
+    edit_data.genres = genresByName(submit_form.genres.data)
+    # the genres live in their own table: the row itself may not change
+    edit_data.updated_at = utcNow()
+    edit_data.address = submit_form.address.data
+    edit_data.city = submit_form.city.data
+    edit_data.state = submit_form.state.data
+    edit_data.phone = submit_form.phone.data
+    edit_data.website = submit_form.website_link.data
+    edit_data.facebook_link = submit_form.facebook_link.data
+    edit_data.seeking_talent = submit_form.seeking_talent.data
+    edit_data.seeking_description = submit_form.seeking_description.data
+    edit_data.image_link = submit_form.image_link.data
+    artist_ids = [row[0] for row in db.session.query(Show.c.artist_id).filter_by(venue_id = venue_id)]
+    touchEntities(Artist, artist_ids)
+    db.session.commit()
+    searchIndexes()[Venue].rename(venue_id, submit_form.name.data)
+  except:
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  return redirect(url_for('venues.show_venue', venue_id=venue_id))
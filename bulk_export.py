@@ -0,0 +1,63 @@
+#----------------------------------------------------------------------------#
+# Streaming export of the catalog as CSV or NDJSON.
+#
+# Rows come from a server-side cursor in batches and are encoded one batch
+# at a time, optionally gzip-compressed on the fly, so memory stays
+# constant whatever the size of the table.
+#----------------------------------------------------------------------------#
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+FORMATS = ('csv', 'ndjson')
+
+def batches(query, batch_rows):
+  # query: a Core/ORM select of plain columns
+  rows = query.execution_options(yield_per=batch_rows)
+  batch = []
+  for row in rows:
+    batch.append(row)
+    if len(batch) >= batch_rows:
+      yield batch
+      batch = []
+  if batch:
+    yield batch
+
+def _value(value):
+  return value.isoformat() if isinstance(value, datetime) else value
+
+def csvChunks(columns, row_batches):
+  buf = io.StringIO()
+  writer = csv.writer(buf)
+  writer.writerow(columns)
+  for batch in row_batches:
+    writer.writerows([[_value(v) for v in row] for row in batch])
+    yield buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+  if buf.tell():
+    yield buf.getvalue()
+
+def ndjsonChunks(columns, row_batches):
+  for batch in row_batches:
+    yield ''.join(
+      json.dumps({c: _value(v) for c, v in zip(columns, row)}, separators=(',', ':')) + '\n'
+      for row in batch
+    )
+
+def gzipChunks(chunks):
+  compressor = zlib.compressobj(wbits=31)  # gzip container
+  for chunk in chunks:
+    data = compressor.compress(chunk.encode())
+    if data:
+      yield data
+  yield compressor.flush()
+
+def export(columns, query, fmt='csv', compress=False, batch_rows=1000):
+  # returns an iterator of str chunks, or of bytes when compressed
+  encode = csvChunks if fmt == 'csv' else ndjsonChunks
+  chunks = encode(columns, batches(query, batch_rows))
+  return gzipChunks(chunks) if compress else chunks
@@ -0,0 +1,279 @@
+#----------------------------------------------------------------------------#
+# Bulk import of venues, artists and shows from CSV or NDJSON files.
+#
+# Records are validated with the same WTForms classes as the create forms,
+# written in batches (COPY into a staging table on PostgreSQL, multi-row
+# INSERTs elsewhere) and committed one batch at a time. After each commit
+# the number of consumed records is saved to a checkpoint file, so an
+# interrupted import resumes after the last committed batch; the checkpoint
+# is removed once the whole file is in. Valid rows that duplicate an existing
+# show are skipped by the database and counted apart from the rows
+# accepted, which are the rows inserted. Venues and
+# artists are inserted with RETURNING so that their genre rows can follow in
+# the same batch.
+#----------------------------------------------------------------------------#
+
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import column, insert, select, table as table_clause, text
+from werkzeug.datastructures import MultiDict
+
+#----------------------------------------------------------------------------#
+# Reading.
+
+def readRecords(path):
+  if path.endswith('.csv'):
+    with open(path, newline='') as f:
+      for record in csv.DictReader(f):
+        yield record
+  else:
+    with open(path) as f:
+      for line in f:
+        if line.strip():
+          yield json.loads(line)
+
+def toFormdata(record):
+  formdata = MultiDict()
+  for key, value in record.items():
+    if key == 'genres' and isinstance(value, str):
+      value = [g.strip() for g in value.split(',') if g.strip()]
+    if isinstance(value, list):
+      for item in value:
+        formdata.add(key, str(item))
+    elif value is not None:
+      formdata.add(key, str(value).lower() if isinstance(value, bool) else str(value))
+  return formdata
+
+#----------------------------------------------------------------------------#
+# Per-kind rules: form class and mapping of the validated form data to a row.
+
+def venueRow(record, data):
+  return {
+    'name': data['name'], 'city': data['city'], 'state': data['state'],
+    'address': data['address'], 'phone': data['phone'], 'genres': data['genres'],
+    'image_link': data['image_link'], 'facebook_link': data['facebook_link'],
+    'website': data['website_link'], 'seeking_talent': data['seeking_talent'],
+    'seeking_description': data['seeking_description']
+  }
+
+def artistRow(record, data):
+  return {
+    'name': data['name'], 'city': data['city'], 'state': data['state'],
+    'phone': data['phone'], 'genres': data['genres'],
+    'image_link': data['image_link'], 'facebook_link': data['facebook_link'],
+    'website': data['website_link'], 'seeking_venue': data['seeking_venue'],
+    'seeking_description': data['seeking_description']
+  }
+
+def showRow(record, data):
+  return {
+    'artist_id': int(data['artist_id']), 'venue_id': int(data['venue_id']),
+    'start_time': data['start_time']
+  }
+
+#----------------------------------------------------------------------------#
+# Writers.
+
+class InsertWriter:
+  # multi-row INSERT; duplicates are skipped where the dialect allows it.
+  # write() returns the number of rows inserted.
+
+  def __init__(self, session, table):
+    self.session = session
+    self.table = table
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+      from sqlalchemy.dialects.sqlite import insert as dialect_insert
+      self.statement = dialect_insert(table).on_conflict_do_nothing()
+    elif dialect == 'postgresql':
+      from sqlalchemy.dialects.postgresql import insert as dialect_insert
+      self.statement = dialect_insert(table).on_conflict_do_nothing()
+    else:
+      self.statement = None
+      self.insert = insert(table)
+    if self.statement is not None:
+      # the skipped rows return nothing
+      self.statement = self.statement.returning(*table.primary_key.columns)
+
+  def write(self, rows):
+    if self.statement is None:
+      self.session.execute(self.insert, rows)
+      return len(rows)
+    return len(self.session.execute(self.statement, rows).all())
+
+# PostgreSQL drivers with COPY FROM STDIN; postgresql:// URLs use psycopg 3
+COPY_DRIVERS = ('psycopg', 'psycopg2')
+
+class CopyWriter:
+  # PostgreSQL (psycopg 3 or psycopg2): COPY the batch into a temporary
+  # staging table, then move it over with INSERT ... SELECT ... ON CONFLICT
+  # DO NOTHING
+
+  def __init__(self, session, table, columns):
+    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    self.session = session
+    self.table = table
+    self.columns = columns
+    self.column_list = ', '.join('"%s"' % c for c in columns)
+    # one staging table per target, should a session load several
+    self.stage = 'import_stage_%s' % table.name.lower()
+    stage = table_clause(self.stage, *[column(c) for c in columns])
+    # a statement rather than SQL text, so the session sees what it writes
+    self.move = dialect_insert(table).from_select(columns, select(*stage.c), include_defaults=False) \
+      .on_conflict_do_nothing()
+
+  def write(self, rows):
+    connection = self.session.connection()
+    connection.execute(text(
+      'CREATE TEMP TABLE IF NOT EXISTS %s (LIKE "%s" INCLUDING DEFAULTS) ON COMMIT DELETE ROWS'
+      % (self.stage, self.table.name)
+    ))
+    buf = io.StringIO()
+    # strings are quoted, so '' stays an empty string and None is NULL
+    writer = csv.writer(buf, quoting=csv.QUOTE_NONNUMERIC)
+    for row in rows:
+      writer.writerow([row[c] for c in self.columns])
+    copy = 'COPY %s (%s) FROM STDIN WITH (FORMAT csv)' % (self.stage, self.column_list)
+    cursor = connection.connection.driver_connection.cursor()
+    if hasattr(cursor, 'copy_expert'):
+      # psycopg2
+      buf.seek(0)
+      cursor.copy_expert(copy, buf)
+    else:
+      with cursor.copy(copy) as stream:
+        stream.write(buf.getvalue())
+    inserted = self.session.execute(self.move).rowcount
+    connection.execute(text('TRUNCATE %s' % self.stage))
+    return inserted
+
+class GenreWriter:
+  # venues and artists: multi-row INSERT ... RETURNING id, then the rows of
+  # the genre association table for the whole batch
+
+  def __init__(self, session, table, link, genre_ids):
+    self.session = session
+    self.statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    self.link = link
+    self.key = [c.name for c in link.c if c.name != 'genre_id'][0]
+    self.genre_ids = genre_ids  # name -> Genre.id
+
+  def write(self, rows):
+    ids = self.session.execute(
+      self.statement, [{k: v for k, v in row.items() if k != 'genres'} for row in rows]
+    ).scalars().all()
+    links = [
+      {self.key: entity_id, 'genre_id': self.genre_ids[name]}
+      for entity_id, row in zip(ids, rows) for name in dict.fromkeys(row['genres'])
+    ]
+    if links:
+      self.session.execute(insert(self.link), links)
+    return len(ids)
+
+def makeWriter(session, table, columns, genres=None):
+  # genres: (association table, {name: Genre.id}) for venues and artists
+  if genres is not None:
+    return GenreWriter(session, table, *genres)
+  if session.get_bind().dialect.driver in COPY_DRIVERS:
+    return CopyWriter(session, table, columns)
+  return InsertWriter(session, table)
+
+#----------------------------------------------------------------------------#
+# Checkpoints.
+
+def loadCheckpoint(path):
+  if path and os.path.exists(path):
+    with open(path) as f:
+      return json.load(f).get('records', 0)
+  return 0
+
+def removeCheckpoint(path):
+  if path and os.path.exists(path):
+    os.remove(path)
+
+def saveCheckpoint(path, records):
+  if path:
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+      json.dump({'records': records}, f)
+    os.replace(tmp, path)
+
+#----------------------------------------------------------------------------#
+# Import.
+
+def run(db, kind, table, form_class, path, batch_size=5000, checkpoint=None,
+    rejects=None, known_ids=None, genres=None, echo=print):
+  # kind: 'venues', 'artists' or 'shows'
+  # known_ids: for shows, {'venue_id': set, 'artist_id': set} of existing ids
+  # genres: for venues and artists, (association table, {name: Genre.id})
+  to_row = {'venues': venueRow, 'artists': artistRow, 'shows': showRow}[kind]
+  skip = loadCheckpoint(checkpoint)
+  if skip:
+    echo('resuming after %d records (checkpoint %s)' % (skip, checkpoint))
+  rejects_file = open(rejects, 'a') if rejects else None
+  writer = None
+  batch = []
+  stats = {'read': skip, 'accepted': 0, 'duplicates': 0, 'rejected': 0}
+  start = time.perf_counter()
+
+  def flush():
+    nonlocal writer
+    inserted = 0
+    if batch:
+      if writer is None:
+        writer = makeWriter(db.session, table, list(batch[0]), genres)
+      inserted = writer.write(batch)
+    db.session.commit()
+    saveCheckpoint(checkpoint, stats['read'])
+    stats['accepted'] += inserted
+    stats['duplicates'] += len(batch) - inserted
+    batch.clear()
+    elapsed = time.perf_counter() - start
+    echo('%d records read, %d accepted, %d duplicates, %d rejected, %.0f rows/s' % (
+      stats['read'], stats['accepted'], stats['duplicates'], stats['rejected'],
+      stats['accepted'] / elapsed if elapsed else 0))
+
+  try:
+    for number, record in enumerate(readRecords(path), start=1):
+      if number <= skip:
+        continue
+      stats['read'] = number
+      form = form_class(toFormdata(record), meta={'csrf': False})
+      errors = None
+      if not form.validate():
+        errors = form.errors
+      elif known_ids is not None:
+        errors = {
+          key: ['%s does not exist' % form.data[key]] for key in known_ids
+          if not str(form.data[key] or '').isdigit() or int(form.data[key]) not in known_ids[key]
+        } or None
+      if errors:
+        stats['rejected'] += 1
+        if rejects_file:
+          rejects_file.write(json.dumps({'record': number, 'errors': errors, 'data': record}) + '\n')
+        continue
+      row = to_row(record, form.data)
+      if 'updated_at' in table.c:
+        row['updated_at'] = datetime.now(timezone.utc).replace(tzinfo=None)
+      batch.append(row)
+      if len(batch) >= batch_size:
+        flush()
+    flush()
+    # complete: a later run of the same file starts over
+    removeCheckpoint(checkpoint)
+  finally:
+    if rejects_file:
+      rejects_file.close()
+
+  elapsed = time.perf_counter() - start
+  stats['seconds'] = elapsed
+  stats['rows_per_second'] = stats['accepted'] / elapsed if elapsed else 0
+  return stats
+
+def existingIds(db, **columns):
+  # e.g. existingIds(db, venue_id=Venue.id) -> {'venue_id': {1, 2, ...}}
+  return {key: set(db.session.scalars(select(column))) for key, column in columns.items()}
@@ -0,0 +1,420 @@
+#----------------------------------------------------------------------------#
+# Catalog operations shared by the blueprints and the CLI commands: search
+# indexes, show scheduling, genres, show timelines, the maintained show
+# counters and the rendered-page cache.
+#----------------------------------------------------------------------------#
+
+import asyncio
+import re
+from datetime import datetime
+
+from flask import current_app, session, g, abort
+from sqlalchemy import case, event, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from db_routing import RoutingSession, usePrimary
+from instrumentation import requestMetrics
+from models import db, utcNow, Show, ChangeCounter, venue_genre, artist_genre, Genre, Venue, Artist
+
+#----------------------------------------------------------------------------#
+# Search index.
+# Optional in-memory n-gram index answering the search pages without the
+# database (SEARCH_INDEX_ENABLED). Built on first use in each worker and kept
+# current by the create/edit/delete handlers.
+# The indexes and the page cache belong to the app (create_app() puts them in
+# app.extensions).
+def searchIndexes():
+  return current_app.extensions['search_indexes']
+
+def searchIndex(model):
+  if not current_app.config['SEARCH_INDEX_ENABLED']:
+    return None
+  index = searchIndexes()[model]
+  if not index.built:
+    index.build(db.session.query(model.id, model.name, model.upcoming_shows_count))
+    current_app.logger.info('%s search index built: %s', model.__tablename__, index.stats())
+  return index
+
+# Marks venues or artists as changed because something shown on their page
+# (e.g. the name of a counterpart in a show tile) changed.
+def touchEntities(model, ids):
+  ids = list(set(int(i) for i in ids))
+  if len(ids) > 0:
+    db.session.execute(update(model).where(model.id.in_(ids)).values(updated_at = utcNow()))
+
+# Change counters.
+# Tables written by a transaction are collected on its session: ORM flushes
+# and DML statements (bulk updates, show inserts, imports) alike. Before the
+# commit the counters of the listed tables among them move forward in the
+# same transaction, so a replica never sees the rows without their counter.
+# Writers of one table serialize on its counter row until they commit.
+COUNTED_TABLES = (Venue.__tablename__, Artist.__tablename__, Show.name)
+
+def changedTables(session):
+  return session.info.setdefault('changed_tables', set())
+
+@event.listens_for(RoutingSession, 'before_flush')
+def recordFlushedTables(session, flush_context, instances):
+  for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+    changedTables(session).add(instance.__table__.name)
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def recordWrittenTable(orm_execute_state):
+  if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+    changedTables(orm_execute_state.session).add(orm_execute_state.statement.table.name)
+
+@event.listens_for(RoutingSession, 'before_commit')
+def bumpChangeCounters(session):
+  session.flush()
+  names = sorted(changedTables(session).intersection(COUNTED_TABLES))
+  if len(names) > 0:
+    if db.engine.dialect.name == 'postgresql':
+      from sqlalchemy.dialects.postgresql import insert
+    else:
+      from sqlalchemy.dialects.sqlite import insert
+    upsert = insert(ChangeCounter)
+    session.execute(upsert.on_conflict_do_update(
+      index_elements=[ChangeCounter.c.table_name],
+      set_={'generation': ChangeCounter.c.generation + 1, 'changed_at': upsert.excluded.changed_at}
+    ), [{'table_name': name, 'generation': 1, 'changed_at': utcNow()} for name in names])
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def forgetChangedTables(session, transaction):
+  if transaction.parent is None:
+    session.info.pop('changed_tables', None)
+
+# {table name: (generation, changed_at)} of the given tables
+def changeCounters(tables):
+  rows = db.session.query(ChangeCounter.c.table_name, ChangeCounter.c.generation, ChangeCounter.c.changed_at) \
+    .filter(ChangeCounter.c.table_name.in_([table.name for table in tables]))
+  return {name: (generation, changed_at) for name, generation, changed_at in rows}
+
+# Query of a catalog dump: every column of the venue, artist or show table
+# (plus the comma-joined genres of venues and artists), optionally filtered
+# by state (venues, artists) or start_time range (shows).
+def exportQuery(kind, state=None, start=None, end=None):
+  table = {'venues': Venue.__table__, 'artists': Artist.__table__, 'shows': Show}[kind]
+  columns = list(table.c)
+  if kind != 'shows':
+    columns.append(genreAggregate(Venue if kind == 'venues' else Artist))
+  query = db.session.query(*columns)
+  if state and kind != 'shows':
+    query = query.filter(table.c.state == state)
+  if start and kind == 'shows':
+    query = query.filter(Show.c.start_time >= start)
+  if end and kind == 'shows':
+    query = query.filter(Show.c.start_time < end)
+  return [c.name for c in columns], query.order_by(*table.primary_key.columns)
+
+# Function to validate
+# DateTime(YYYY-MM-DD HH:MM:SS)
+# Regex to check valid DateTime
+# (YYYY-MM-DD HH:MM:SS), compiled once
+SHOW_TIME_REGEX = re.compile(
+    "^([0-9]{4})-((01|02|03|04|05|06|07|08|09|10|11|12|" \
+    "(?:J(anuary|u(ne|ly))|February|Ma(rch|y)|A(pril|ugust)" \
+    "|(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)|" \
+    "(JANUARY|FEBRUARY|MARCH|APRIL|MAY|JUNE|JULY|AUGUST|" \
+    "SEPTEMBER|OCTOBER|NOVEMBER|DECEMBER)|(September|October|" \
+    "November|December)|(jan|feb|mar|apr|may|jun|jul|aug|sep|" \
+    "oct|nov|dec)|(JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|" \
+    "NOV|DEC)))|(january|february|march|april|may|june|july|" \
+    "august|september|october|november|december))-([0-3][0-9])" \
+    "\\s([0-1][0-9]|[2][0-3]):([0-5][0-9]):([0-5][0-9])$"
+)
+
+def isValid_DateTime(str):
+    # If the string is empty
+    # return false
+    if (str == None):
+        return False
+
+    # Return if the string
+    # matched the ReGex
+    return SHOW_TIME_REGEX.search(str) is not None
+
+# Start time of a show as the show form takes it, or None when invalid.
+# Numeric dates take the fromisoformat fast path; month names go through
+# dateutil.
+def parseShowTime(value):
+  if not isinstance(value, str) or not isValid_DateTime(value):
+    return None
+  try:
+    return datetime.fromisoformat(value)
+  except ValueError:
+    pass
+  import dateutil.parser
+  try:
+    return dateutil.parser.parse(value)
+  except (ValueError, OverflowError):
+    return None
+
+# Show scheduling.
+# INSERT ... ON CONFLICT DO NOTHING into the show table: a pair that is
+# already scheduled is skipped by its primary key.
+def showInsert():
+  if db.engine.dialect.name == 'postgresql':
+    from sqlalchemy.dialects.postgresql import insert
+  else:
+    from sqlalchemy.dialects.sqlite import insert
+  return insert(Show).on_conflict_do_nothing().returning(Show.c.artist_id, Show.c.venue_id)
+
+# Inserts the shows in one statement. The artist and venue ids are only
+# looked up when a foreign key rejects the batch, which is then retried
+# without the bad rows (again if an artist or venue was deleted meanwhile).
+# Returns the (artist_id, venue_id) pairs created and the ({artist ids},
+# {venue ids}) found, or None when nothing was looked up.
+def insertShows(rows):
+  known = None
+  while len(rows) > 0:
+    try:
+      return set(tuple(row) for row in db.session.execute(showInsert(), rows)), known
+    except IntegrityError as e:
+      db.session.rollback()
+      error = e
+    known = (
+      set(db.session.scalars(select(Artist.id).where(Artist.id.in_({row['artist_id'] for row in rows})))),
+      set(db.session.scalars(select(Venue.id).where(Venue.id.in_({row['venue_id'] for row in rows}))))
+    )
+    valid = [row for row in rows if row['artist_id'] in known[0] and row['venue_id'] in known[1]]
+    if len(valid) == len(rows):
+      # not a missing artist or venue
+      raise error
+    rows = valid
+  return set(), known
+
+# Validates and schedules many shows: dicts with artist_id, venue_id and
+# start_time (YYYY-MM-DD HH:MM:SS). Returns one result per show, in order,
+# with status created, duplicate or invalid (and the errors).
+def scheduleShows(shows):
+  results = []
+  rows = {}
+  for index, show in enumerate(shows):
+    show = show if isinstance(show, dict) else {}
+    result = {'index': index, 'status': 'invalid'}
+    errors = {}
+    for key in ('artist_id', 'venue_id'):
+      value = show.get(key)
+      if isinstance(value, int) and not isinstance(value, bool):
+        result[key] = value
+      elif isinstance(value, str) and value.strip().isdigit():
+        result[key] = int(value)
+      else:
+        errors[key] = ['an id is required']
+    start_time = parseShowTime(show.get('start_time'))
+    if start_time is None:
+      errors['start_time'] = ['expected YYYY-MM-DD HH:MM:SS']
+    if errors:
+      result['errors'] = errors
+    elif (result['artist_id'], result['venue_id']) in rows:
+      result['status'] = 'duplicate'
+    else:
+      result['status'] = None
+      rows[(result['artist_id'], result['venue_id'])] = {
+        'artist_id': result['artist_id'], 'venue_id': result['venue_id'],
+        'start_time': start_time, 'updated_at': utcNow()
+      }
+    results.append(result)
+
+  created, known = insertShows(list(rows.values()))
+  for result in results:
+    if result['status'] is not None:
+      continue
+    pair = (result['artist_id'], result['venue_id'])
+    if pair in created:
+      result['status'] = 'created'
+    elif known is not None and (pair[0] not in known[0] or pair[1] not in known[1]):
+      result['status'] = 'invalid'
+      result['errors'] = {
+        key: ['%d does not exist' % result[key]] for key, ids in zip(('artist_id', 'venue_id'), known)
+        if result[key] not in ids
+      }
+    else:
+      result['status'] = 'duplicate'
+
+  if len(created) > 0:
+    venue_ids = {venue_id for _, venue_id in created}
+    artist_ids = {artist_id for artist_id, _ in created}
+    refreshShowCounters(Venue, venue_ids, datetime.now())
+    refreshShowCounters(Artist, artist_ids, datetime.now())
+  db.session.commit()
+  return results
+
+# Genres.
+# Genre rows of the given names, as chosen in VenueForm/ArtistForm.
+def genresByName(names):
+  if not names:
+    return []
+  return Genre.query.filter(Genre.name.in_(names)).all()
+
+def genreLink(model):
+  return (venue_genre, venue_genre.c.venue_id) if model is Venue else (artist_genre, artist_genre.c.artist_id)
+
+# WHERE clause keeping the venues or artists of a genre, through the
+# (genre_id, venue_id|artist_id) index
+def genreFilter(model, name):
+  link, key = genreLink(model)
+  return model.id.in_(select(key).join(Genre, Genre.id == link.c.genre_id).where(Genre.name == name))
+
+# genre names of many venues or artists in one query: {id: [name, ...]}
+def genreNames(model, ids):
+  link, key = genreLink(model)
+  names = {i: [] for i in ids}
+  if len(names) > 0:
+    for entity_id, name in db.session.query(key, Genre.name).join(Genre, Genre.id == link.c.genre_id) \
+        .filter(key.in_(list(names))).order_by(key, Genre.name):
+      names[entity_id].append(name)
+  return names
+
+# comma-joined genre names of each row, as a correlated subquery
+def genreAggregate(model):
+  link, key = genreLink(model)
+  if db.engine.dialect.name == 'postgresql':
+    from sqlalchemy.dialects.postgresql import aggregate_order_by
+    joined = func.string_agg(Genre.name, aggregate_order_by(',', Genre.name))
+  else:
+    joined = func.group_concat(Genre.name, ',')
+  return select(joined).select_from(link).join(Genre, Genre.id == link.c.genre_id).where(key == model.id) \
+    .scalar_subquery().label('genres')
+
+# Show timeline of a venue or an artist.
+# Fetches the shows together with the counterpart name and image in a single
+# query ordered by start_time (served by the (venue_id|artist_id, start_time)
+# indexes); the past/upcoming split is computed by the database against the
+# request-time "now".
+def showTimelineQuery(now, entity_id, category = 'venue'):
+  upcoming = (Show.c.start_time > now).label('upcoming')
+  if category == 'venue':
+    query = select(
+      Show.c.artist_id, Show.c.start_time, Artist.name, Artist.image_link, upcoming
+    ).join(Artist, Artist.id == Show.c.artist_id).where(Show.c.venue_id == entity_id)
+  else:
+    query = select(
+      Show.c.venue_id, Show.c.start_time, Venue.name, Venue.image_link, upcoming
+    ).join(Venue, Venue.id == Show.c.venue_id).where(Show.c.artist_id == entity_id)
+  return query.order_by(Show.c.start_time)
+
+# rows: the result of showTimelineQuery() when already fetched
+def showTimeline(now, entity_id, category = 'venue', rows = None):
+  dataType = {
+    'upcoming_shows': 0,
+    'past_shows': 0,
+    'past_shows_list':[],
+    'upcoming_shows_list':[]
+  }
+  prefix = 'artist' if category == 'venue' else 'venue'
+  if rows is None:
+    rows = db.session.execute(showTimelineQuery(now, entity_id, category)).all()
+  for counterpart_id, start_time, name, image_link, is_upcoming in rows:
+    show_info = {
+      'start_time': start_time,
+      prefix + '_id': counterpart_id,
+      prefix + '_name': name,
+      prefix + '_image_link': image_link
+    }
+    if is_upcoming:
+      dataType['upcoming_shows'] += 1
+      dataType['upcoming_shows_list'].append(show_info)
+    else:
+      dataType['past_shows'] += 1
+      dataType['past_shows_list'].append(show_info)
+  return dataType
+
+# Detail page data of a venue or an artist through the async engine
+# (ASYNC_DETAIL_PAGES, async_db.py): the entity row, its genre names and its
+# show timeline are fetched at the same time on three connections, from the
+# replica the request was routed to. Returns (row, genre names, timeline).
+def fetchDetail(model, entity_id, now):
+  category = 'venue' if model is Venue else 'artist'
+  link, key = genreLink(model)
+  queries = [
+    select(model.__table__).where(model.id == entity_id),
+    select(Genre.name).join(link, link.c.genre_id == Genre.id).where(key == entity_id).order_by(Genre.name),
+    showTimelineQuery(now, entity_id, category),
+  ]
+
+  # counted against this request's queries and budget
+  state = requestMetrics()
+
+  async def fetch(query, engine):
+    async with engine.connect() as connection:
+      await connection.execution_options(request_metrics=state)
+      return (await connection.execute(query)).all()
+
+  async def fetchAll(engine):
+    return await asyncio.gather(*[fetch(query, engine) for query in queries])
+
+  try:
+    entity, genres, shows = current_app.extensions['async_db'].run(
+      fetchAll, g.get('db_replica'), current_app.config['ASYNC_DB_TIMEOUT']
+    )
+  except TimeoutError as e:
+    # the database is overloaded, not the page broken
+    current_app.logger.warning('%s %d: %s', category, entity_id, e)
+    abort(503)
+  if len(entity) == 0:
+    abort(404)
+  return entity[0], [name for name, in genres], showTimeline(now, entity_id, category, shows)
+
+# Maintained show counters of venues and artists.
+# Recomputes upcoming_shows_count, past_shows_count and next_show_time of the
+# given venues or artists with one grouped query and one bulk UPDATE.
+def refreshShowCounters(model, ids, now):
+  ids = list(set(int(i) for i in ids))
+  if len(ids) == 0:
+    return
+  # counted and written on the primary, a replica may lag
+  usePrimary()
+  key = Show.c.venue_id if model is Venue else Show.c.artist_id
+  rows = db.session.query(
+    key,
+    func.count(case((Show.c.start_time > now, 1))),
+    func.count(case((Show.c.start_time <= now, 1))),
+    func.min(case((Show.c.start_time > now, Show.c.start_time)))
+  ).filter(key.in_(ids)).group_by(key).all()
+  counters = {i: {'id': i, 'upcoming_shows_count': 0, 'past_shows_count': 0, 'next_show_time': None, 'updated_at': utcNow()}
+    for i in ids}
+  for entity_id, upcoming_count, past_count, next_show_time in rows:
+    counters[entity_id].update(
+      upcoming_shows_count = upcoming_count, past_shows_count = past_count, next_show_time = next_show_time
+    )
+  db.session.execute(update(model), list(counters.values()))
+  for entity_id, counter in counters.items():
+    searchIndexes()[model].setUpcoming(entity_id, counter['upcoming_shows_count'])
+
+# Moves shows that started since the last refresh from upcoming to past.
+# Only rows whose next_show_time has passed are touched, so on most requests
+# this is a single indexed lookup returning nothing.
+def expireShowCounters(model, now):
+  ids = [row[0] for row in db.session.query(model.id).filter(model.next_show_time <= now)]
+  if len(ids) > 0:
+    refreshShowCounters(model, ids, now)
+    db.session.commit()
+
+def refreshAllShowCounters():
+  now = datetime.now()
+  for model in (Venue, Artist):
+    ids = [row[0] for row in db.session.query(model.id)]
+    for start in range(0, len(ids), 1000):
+      refreshShowCounters(model, ids[start:start + 1000], now)
+    db.session.commit()
+
+# Rendered-page cache of the venue, artist and shows pages.
+# A page is keyed by its ETag, which every write showing on it moves, so a
+# worker never serves a page cached before another worker's or the CLI's
+# write. Pages are not served from or stored into the cache while flashed
+# messages are pending, since the layout renders them into the page.
+def pageCache():
+  return current_app.extensions['page_cache']
+
+def cachedPage(key):
+  if '_flashes' in session:
+    return None
+  return pageCache().get(key)
+
+# Pages read from a replica are not cached: a lagging replica's page would be
+# served to every reader still holding its old ETag.
+def cachePage(key, html):
+  if '_flashes' not in session and not g.get('db_replica'):
+    pageCache().set(key, html)
+  return html
@@ -0,0 +1,223 @@
+#----------------------------------------------------------------------------#
+# CLI commands (flask <command>).
+#
+# Registered at the top level of the flask command by the `commands`
+# blueprint. Heavy modules (WTForms, dateutil, alembic) are imported by the
+# commands needing them, so every other command starts without them.
+#----------------------------------------------------------------------------#
+
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import click
+from flask import Blueprint, current_app
+from flask.cli import ScriptInfo
+
+import bench_routes
+import bulk_export
+import bulk_import
+import date_format
+import seed_data
+from catalog import exportQuery, refreshAllShowCounters, searchIndexes, pageCache
+from models import db, Show, venue_genre, artist_genre, Genre, Venue, Artist
+
+bp = Blueprint('commands', __name__, cli_group=None)
+
+class MigrateGroup(click.Group):
+  # `flask db ...`: Flask-Migrate, and with it alembic, is set up on the app
+  # only when a migration command runs; its own `db` group then takes over
+
+  def make_context(self, info_name, args, parent=None, **extra):
+    from flask_migrate import Migrate
+    from flask_migrate.cli import db as db_commands
+    app = parent.ensure_object(ScriptInfo).load_app()
+    if 'migrate' not in app.extensions:
+      Migrate(app, db)
+    return db_commands.make_context(info_name, args, parent=parent, **extra)
+
+migrate_commands = MigrateGroup('db', help='Perform database migrations (Flask-Migrate).')
+
+@bp.cli.command('refresh-show-counters')
+def refresh_show_counters():
+  # full recompute of the maintained show counters, e.g. from a nightly cron
+  refreshAllShowCounters()
+
+@bp.cli.command('search-index-stats')
+def search_index_stats():
+  # builds both search indexes and reports their size and build time
+  for model, index in searchIndexes().items():
+    index.build(db.session.query(model.id, model.name, model.upcoming_shows_count))
+    print(model.__tablename__, index.stats())
+
+@bp.cli.command('bench-datetime-format')
+@click.option('--shows', default=10000, show_default=True, help='Show tiles on the page.')
+@click.option('--slots', default=500, show_default=True, help='Distinct start times among them.')
+def bench_datetime_format(shows, slots):
+  # per-tile cost of the `datetime` template filter, uncached vs cached
+  results = date_format.benchmark(shows, slots)
+  for name, value in results.items():
+    print('%-20s %8.2f us/tile' % (name, value))
+  print('%-20s %8.1fx' % ('speedup (warm)', results['before_string_us'] / results['after_warm_us']))
+
+@bp.cli.command('seed-catalog')
+@click.option('--venues', 'venue_count', default=10000, show_default=True)
+@click.option('--artists', 'artist_count', default=100000, show_default=True)
+@click.option('--shows', 'show_count', default=1000000, show_default=True)
+@click.option('--seed', default=1, show_default=True, help='Same seed, same catalog.')
+@click.option('--anchor', default=None, help='Date the shows are spread around, defaults to today.')
+@click.option('--batch-size', default=5000, show_default=True)
+def seed_catalog(venue_count, artist_count, show_count, seed, anchor, batch_size):
+  # reproducible synthetic catalog, added after the existing rows
+  import dateutil.parser
+  seedCatalog(venue_count, artist_count, show_count, seed, dateutil.parser.parse(anchor) if anchor else None, batch_size)
+
+def seedCatalog(venue_count, artist_count, show_count, seed=1, anchor=None, batch_size=5000, echo=print):
+  from forms import GENRES
+  tables = {
+    'venue': Venue.__table__, 'artist': Artist.__table__, 'show': Show, 'genre': Genre.__table__,
+    'venue_genre': venue_genre, 'artist_genre': artist_genre
+  }
+  seed_data.seed(
+    db, tables, GENRES, venue_count, artist_count, show_count, seed = seed, anchor = anchor,
+    batch_size = batch_size, echo = echo
+  )
+  refreshAllShowCounters()
+
+# The benchmark writes (creates, edits, deletes): by default it runs on a
+# fresh SQLite database seeded for the run and removed after it, never on
+# the configured one.
+@contextmanager
+def benchApp(database_url, venue_count, artist_count, show_count):
+  import config
+  from app import create_app
+  if database_url == current_app.config['SQLALCHEMY_DATABASE_URI']:
+    raise click.UsageError('the benchmark writes to its database: give a throwaway one, not the configured database')
+  directory = None
+  if database_url is None:
+    directory = tempfile.mkdtemp(prefix='fyyur-bench-')
+    database_url = 'sqlite:///' + os.path.join(directory, 'bench.db')
+  settings = {key: getattr(config, key) for key in dir(config) if key.isupper()}
+  settings.update(SQLALCHEMY_DATABASE_URI = database_url, DATABASE_REPLICA_URLS = [])
+  app = create_app(type('BenchConfig', (), settings))
+  try:
+    if directory is not None:
+      with app.app_context():
+        # the primary only: replica binds of the CLI's own app share db's metadata
+        db.create_all(bind_key = None)
+        seedCatalog(venue_count, artist_count, show_count, echo = lambda line: None)
+    yield app
+  finally:
+    app.extensions['async_db'].close()
+    with app.app_context():
+      db.engine.dispose()
+    if directory is not None:
+      shutil.rmtree(directory, ignore_errors = True)
+
+@bp.cli.command('bench-routes')
+@click.option('--repeat', default=20, show_default=True, help='Timed requests per route.')
+@click.option('--warmup', default=2, show_default=True)
+@click.option('--only', multiple=True, help='Route name, see bench_routes.ROUTES (repeatable).')
+@click.option('--baseline', default='bench-baseline.json', show_default=True, help='Baseline to compare with.')
+@click.option('--save', is_flag=True, help='Save this run as the baseline.')
+@click.option('--tolerance', default=0.25, show_default=True, help='Allowed slowdown and memory growth.')
+@click.option('--page-cache/--no-page-cache', default=False, show_default=True)
+@click.option('--database-url', default=None, help='Throwaway database to run on, written to; defaults to a fresh SQLite one.')
+@click.option('--venues', 'venue_count', default=200, show_default=True, help='Venues seeded into the fresh database.')
+@click.option('--artists', 'artist_count', default=2000, show_default=True)
+@click.option('--shows', 'show_count', default=20000, show_default=True)
+def bench_routes_command(repeat, warmup, only, baseline, save, tolerance, page_cache, database_url,
+                         venue_count, artist_count, show_count):
+  # latency, queries and peak memory of every route; exits 1 on regressions
+  with benchApp(database_url, venue_count, artist_count, show_count) as app:
+    if not page_cache:
+      app.extensions['page_cache'].backend = None
+    results = bench_routes.run(app, db, Venue.__table__, Artist.__table__, repeat, warmup, only)
+  if save:
+    bench_routes.save(baseline, results)
+    print('baseline saved to %s' % baseline)
+    return
+  if not os.path.exists(baseline):
+    print('no baseline at %s, run with --save first' % baseline)
+    return
+  regressions = bench_routes.compare(results, bench_routes.load(baseline), tolerance)
+  for regression in regressions:
+    print('REGRESSION', regression)
+  if regressions:
+    sys.exit(1)
+
+@bp.cli.command('bench-startup')
+@click.option('--path', default='/venues', show_default=True, help='Route of the first request.')
+@click.option('--repeat', default=5, show_default=True, help='Fresh processes to take the median of.')
+def bench_startup(path, repeat):
+  # import, create_app() and first-request times of a fresh process
+  result = bench_routes.startup(path, repeat)
+  for key in ('process_ms', 'import_ms', 'create_app_ms', 'first_request_ms', 'second_request_ms'):
+    print('%-20s %9.1f ms' % (key[:-3], result[key]))
+  print('%-20s %9d' % ('status', result['status']))
+  print('%-20s %s' % ('lazy loaded at start', ', '.join(result['loaded_at_startup']) or '-'))
+  print('%-20s %s' % ('after request', ', '.join(result['loaded_after_request']) or '-'))
+
+@bp.cli.command('bench-detail-pages')
+@click.option('--requests', 'request_count', default=400, show_default=True, help='Pages requested per mode.')
+@click.option('--concurrency', default=8, show_default=True, help='Concurrent request threads.')
+def bench_detail_pages(request_count, concurrency):
+  # venue and artist pages through the sync session, then the async engine
+  pageCache().backend = None
+  venue_ids = db.session.scalars(db.select(Venue.id).order_by(Venue.id).limit(100)).all()
+  artist_ids = db.session.scalars(db.select(Artist.id).order_by(Artist.id).limit(100)).all()
+  db.session.close()
+  paths = [p for pair in zip(['/venues/%d' % i for i in venue_ids], ['/artists/%d' % i for i in artist_ids]) for p in pair]
+  app = current_app._get_current_object()
+  results = bench_routes.detailPages(app, paths, request_count, concurrency)
+  app.extensions['async_db'].close()
+  for mode, row in results.items():
+    print('%-6s %9.2f ms p50 %9.2f ms p95 %8.1f req/s  %s' % (
+      mode, row['p50_ms'], row['p95_ms'], row['rps'], ','.join(str(s) for s in row['status'])))
+
+@bp.cli.command('import-catalog')
+@click.argument('kind', type=click.Choice(['venues', 'artists', 'shows']))
+@click.argument('path')
+@click.option('--batch-size', default=5000, show_default=True, help='Records per batch and commit.')
+@click.option('--checkpoint', default=None, help='Checkpoint file, defaults to PATH.checkpoint.')
+@click.option('--rejects', default=None, help='NDJSON file receiving the rejected records.')
+def import_catalog(kind, path, batch_size, checkpoint, rejects):
+  # bulk load of a CSV (.csv) or NDJSON file, validated like the create forms
+  from forms import VenueForm, ArtistForm, ShowForm
+  tables = {'venues': Venue.__table__, 'artists': Artist.__table__, 'shows': Show}
+  forms = {'venues': VenueForm, 'artists': ArtistForm, 'shows': ShowForm}
+  known_ids = None
+  genres = None
+  if kind == 'shows':
+    known_ids = bulk_import.existingIds(db, venue_id = Venue.id, artist_id = Artist.id)
+  else:
+    genre_ids = dict(db.session.query(Genre.name, Genre.id))
+    genres = (venue_genre if kind == 'venues' else artist_genre, genre_ids)
+  stats = bulk_import.run(
+    db, kind, tables[kind], forms[kind], path, batch_size = batch_size,
+    checkpoint = checkpoint or path + '.checkpoint', rejects = rejects, known_ids = known_ids, genres = genres
+  )
+  if kind == 'shows' and stats['accepted'] > 0:
+    refreshAllShowCounters()
+  print('%(accepted)d rows accepted, %(duplicates)d duplicates, %(rejected)d rejected in %(seconds).1fs'
+    ' (%(rows_per_second).0f rows/s)' % stats)
+
+@bp.cli.command('export-catalog')
+@click.argument('kind', type=click.Choice(['venues', 'artists', 'shows']))
+@click.option('--format', 'fmt', type=click.Choice(bulk_export.FORMATS), default='csv', show_default=True)
+@click.option('--state', default=None, help='Only venues or artists in this state.')
+@click.option('--from', 'start', default=None, help='Only shows starting at or after this date.')
+@click.option('--to', 'end', default=None, help='Only shows starting before this date.')
+@click.option('--gzip', 'compress', is_flag=True, help='Compress the output.')
+@click.option('--output', '-o', default='-', help='Output file, defaults to stdout.')
+def export_catalog_command(kind, fmt, state, start, end, compress, output):
+  # streaming dump of a catalog table
+  import dateutil.parser
+  columns, query = exportQuery(
+    kind, state, dateutil.parser.parse(start) if start else None, dateutil.parser.parse(end) if end else None
+  )
+  with click.open_file(output, 'wb' if compress else 'w') as f:
+    for chunk in bulk_export.export(columns, query, fmt, compress, current_app.config['STREAM_BATCH_ROWS']):
+      f.write(chunk)
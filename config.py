@@ -10,4 +10,77 @@ DEBUG = True
 
 
 # TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgresql://postgres:1@localhost:5432/fyyur'
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://postgres:1@localhost:5432/fyyur')
+
+# Engine and pool profile (db_pool.py): 'default', 'gunicorn', 'pgbouncer'
+# (no client-side pool, for PgBouncer in transaction mode) or 'cli'
+DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+# Overrides of single settings of the profile; unset keeps the profile's
+DB_POOL_SIZE = os.environ.get('DB_POOL_SIZE')
+DB_MAX_OVERFLOW = os.environ.get('DB_MAX_OVERFLOW')
+DB_POOL_TIMEOUT = os.environ.get('DB_POOL_TIMEOUT')
+DB_POOL_RECYCLE = os.environ.get('DB_POOL_RECYCLE')
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING')
+DB_STATEMENT_TIMEOUT_MS = os.environ.get('DB_STATEMENT_TIMEOUT_MS')
+
+# Read replicas, comma-separated (db_routing.py): the read-only views are
+# answered from one of them, writes always go to SQLALCHEMY_DATABASE_URI
+DATABASE_REPLICA_URLS = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url]
+# Seconds a client reads from the primary after its own write
+READ_YOUR_WRITES_SECONDS = float(os.environ.get('READ_YOUR_WRITES_SECONDS', 5))
+
+# Venue and artist pages read through an async engine, their queries run
+# concurrently (async_db.py). Needs sqlalchemy[asyncio] and asyncpg (or
+# aiosqlite for SQLite).
+ASYNC_DETAIL_PAGES = os.environ.get('ASYNC_DETAIL_PAGES', '') == '1'
+# Seconds a detail page waits for its async queries
+ASYNC_DB_TIMEOUT = float(os.environ.get('ASYNC_DB_TIMEOUT', 30))
+
+# Maximum number of rows returned by the venue and artist search
+SEARCH_RESULTS_LIMIT = 50
+
+# Answer the venue and artist search from an in-memory n-gram index built in
+# each worker instead of querying the database
+SEARCH_INDEX_ENABLED = os.environ.get('SEARCH_INDEX_ENABLED', '') == '1'
+
+# Number of rows per page on the /venues, /artists and /shows listings
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 50))
+
+# Rendered-page cache of the venue, artist and shows pages, keyed by their
+# ETags: 'memory' (per worker), 'redis' (shared by the workers, needs the
+# redis package and PAGE_CACHE_URL) or 'none'
+PAGE_CACHE_BACKEND = os.environ.get('PAGE_CACHE_BACKEND', 'memory')
+PAGE_CACHE_URL = os.environ.get('PAGE_CACHE_URL', 'redis://localhost:6379/0')
+PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 1024))
+PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 60))
+
+# Stream the /venues, /artists and /shows listings in full instead of paging
+# them
+STREAM_LISTINGS = os.environ.get('STREAM_LISTINGS', '') == '1'
+# Rows fetched per round trip from the server-side cursor
+STREAM_BATCH_ROWS = int(os.environ.get('STREAM_BATCH_ROWS', 500))
+# Template output pieces buffered before a chunk is sent
+STREAM_BUFFER_SIZE = int(os.environ.get('STREAM_BUFFER_SIZE', 100))
+
+# Token of the /export routes (Authorization: Bearer <token>); unset turns
+# them off, `flask export-catalog` still works
+EXPORT_TOKEN = os.environ.get('EXPORT_TOKEN') or None
+
+# Largest ?limit= accepted by the JSON API listings
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
+# Largest batch accepted by the show scheduling API (POST /api/v1/shows)
+API_MAX_SCHEDULE_SHOWS = int(os.environ.get('API_MAX_SCHEDULE_SHOWS', 1000))
+
+# Directory shared by the worker processes for the /metrics registry (each
+# worker writes <pid>.json there); unset reports the answering worker only.
+# Clear it when the server is restarted.
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+# Seconds between two writes of a worker's metrics file
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+
+# Routes over their declared query budget, or repeating one statement
+# QUERY_REPEAT_THRESHOLD times in a request (N+1): 'log', 'raise' (tests)
+# or 'off'
+QUERY_BUDGET_ACTION = os.environ.get('QUERY_BUDGET_ACTION', 'log')
+QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 5))
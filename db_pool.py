@@ -0,0 +1,157 @@
+#----------------------------------------------------------------------------#
+# Database engine profiles and connection pool statistics.
+#
+# A profile is a named set of pool settings (size, overflow, timeout,
+# recycle, pre-ping, statement timeout) picked with DB_PROFILE; single
+# settings can be overridden with the DB_* variables of config.py. The
+# 'pgbouncer' profile opens a connection per checkout (NullPool) and leaves
+# pooling to PgBouncer in transaction mode.
+#
+# Statistics are counted per engine and per worker process: connections
+# opened, checkouts, checkins, invalidations, time spent getting a
+# connection, pool timeouts and the highest overflow reached.
+#----------------------------------------------------------------------------#
+
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+PROFILES = {
+  # a single process (flask run, tests)
+  'default': {
+    'pool_size': 5, 'max_overflow': 10, 'pool_timeout': 30, 'pool_recycle': 1800,
+    'pool_pre_ping': True, 'statement_timeout_ms': 0,
+  },
+  # one of many gunicorn workers: workers x (pool_size + max_overflow)
+  # must stay under the server's max_connections
+  'gunicorn': {
+    'pool_size': 2, 'max_overflow': 3, 'pool_timeout': 10, 'pool_recycle': 1800,
+    'pool_pre_ping': True, 'statement_timeout_ms': 15000,
+  },
+  # behind PgBouncer in transaction mode: no client-side pool, and no
+  # startup options (set statement_timeout on the role instead)
+  'pgbouncer': {
+    'nullpool': True, 'pool_pre_ping': False, 'statement_timeout_ms': 0,
+  },
+  # CLI commands (import, export, counters): one long-lived connection
+  'cli': {
+    'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 30, 'pool_recycle': -1,
+    'pool_pre_ping': True, 'statement_timeout_ms': 0,
+  },
+}
+
+# config key -> profile setting
+OVERRIDES = {
+  'DB_POOL_SIZE': ('pool_size', int),
+  'DB_MAX_OVERFLOW': ('max_overflow', int),
+  'DB_POOL_TIMEOUT': ('pool_timeout', float),
+  'DB_POOL_RECYCLE': ('pool_recycle', int),
+  'DB_POOL_PRE_PING': ('pool_pre_ping', lambda value: value in ('1', 'true', True)),
+  'DB_STATEMENT_TIMEOUT_MS': ('statement_timeout_ms', int),
+}
+
+SLOW_CHECKOUT_SECONDS = 0.01
+
+class PoolStats:
+
+  def __init__(self, name='default'):
+    self.name = name
+    self.pool = None
+    self.lock = threading.Lock()
+    self.counters = {
+      'connects': 0, 'checkouts': 0, 'checkins': 0, 'invalidations': 0,
+      'timeouts': 0, 'slow_checkouts': 0, 'checkout_seconds_total': 0.0,
+      'checkout_seconds_max': 0.0, 'overflow_max': 0,
+    }
+
+  def incr(self, key):
+    with self.lock:
+      self.counters[key] += 1
+
+  def waited(self, seconds):
+    with self.lock:
+      self.counters['checkout_seconds_total'] += seconds
+      if seconds > self.counters['checkout_seconds_max']:
+        self.counters['checkout_seconds_max'] = seconds
+      if seconds >= SLOW_CHECKOUT_SECONDS:
+        self.counters['slow_checkouts'] += 1
+
+  def checkedOut(self):
+    pool = self.pool
+    with self.lock:
+      self.counters['checkouts'] += 1
+      if isinstance(pool, QueuePool) and pool.overflow() > self.counters['overflow_max']:
+        self.counters['overflow_max'] = pool.overflow()
+
+  def snapshot(self):
+    with self.lock:
+      data = dict(self.counters, engine=self.name)
+    pool = self.pool
+    if isinstance(pool, QueuePool):
+      data.update(
+        pool_size=pool.size(), checked_out=pool.checkedout(),
+        checked_in=pool.checkedin(), overflow=max(pool.overflow(), 0)
+      )
+    else:
+      data.update(checked_out=data['checkouts'] - data['checkins'])
+    return data
+
+class _TimedPool:
+  # time spent in the pool's _do_get(): waiting for a free connection, or
+  # opening a new one when the pool may still grow
+
+  stats = None
+
+  def _do_get(self):
+    self.stats.pool = self
+    start = time.perf_counter()
+    try:
+      return super()._do_get()
+    except exc.TimeoutError:
+      self.stats.incr('timeouts')
+      raise
+    finally:
+      self.stats.waited(time.perf_counter() - start)
+
+def timedPoolClass(base, stats):
+  # a subclass per engine; Pool.recreate() keeps the class, and with it
+  # the statistics
+  pool_class = type('Timed' + base.__name__, (_TimedPool, base), {'stats': stats})
+  event.listen(pool_class, 'connect', lambda dbapi_connection, record: stats.incr('connects'))
+  event.listen(pool_class, 'checkin', lambda dbapi_connection, record: stats.incr('checkins'))
+  event.listen(pool_class, 'invalidate', lambda dbapi_connection, record, exception: stats.incr('invalidations'))
+  event.listen(pool_class, 'checkout', lambda dbapi_connection, record, proxy: stats.checkedOut())
+  return pool_class
+
+def profile(config):
+  name = config.get('DB_PROFILE', 'default')
+  if name not in PROFILES:
+    raise ValueError('unknown DB_PROFILE %r, expected one of %s' % (name, ', '.join(PROFILES)))
+  settings = dict(PROFILES[name])
+  for key, (setting, convert) in OVERRIDES.items():
+    if config.get(key) not in (None, ''):
+      settings[setting] = convert(config[key])
+  return settings
+
+def engineOptions(config, uri, stats):
+  # SQLAlchemy create_engine() keyword arguments for the database at uri
+  settings = profile(config)
+  url = make_url(uri)
+  options = {'pool_pre_ping': settings['pool_pre_ping']}
+  if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+    # a single shared in-memory connection: leave SQLAlchemy's pool alone
+    return options
+  if settings.get('nullpool'):
+    options['poolclass'] = timedPoolClass(NullPool, stats)
+    return options
+  options.update(
+    poolclass=timedPoolClass(QueuePool, stats), pool_size=settings['pool_size'],
+    max_overflow=settings['max_overflow'], pool_timeout=settings['pool_timeout'],
+    pool_recycle=settings['pool_recycle']
+  )
+  if url.get_backend_name() == 'postgresql' and settings['statement_timeout_ms'] > 0:
+    options['connect_args'] = {'options': '-c statement_timeout=%d' % settings['statement_timeout_ms']}
+  return options
@@ -0,0 +1,86 @@
+#----------------------------------------------------------------------------#
+# Read/write splitting over optional read replicas.
+#
+# Every URL of DATABASE_REPLICA_URLS becomes a bind ('replica_0', ...) with
+# its own pool and statistics. A view marked @readReplica reads from one of
+# them, picked per request; every other view, every CLI command and every
+# write uses the primary (SQLALCHEMY_DATABASE_URI). A read view that turns
+# out to write (the show counters refreshed by a listing) moves to the
+# primary for the rest of the request, before the write's own reads.
+#
+# Read-your-writes: after a request that wrote, the client gets a cookie
+# sending its reads to the primary for READ_YOUR_WRITES_SECONDS, longer than
+# the replicas are expected to lag. Other clients may still see the old rows
+# until the replica catches up; the page cache only keeps pages read from the
+# primary (catalog.cachePage).
+#
+# Locally: copy the database file (cp fyyur.db fyyur-replica.db) and set
+# DATABASE_URL=sqlite:///fyyur.db DATABASE_REPLICA_URLS=sqlite:///fyyur-replica.db;
+# the copy does not follow later writes, which shows where each read went.
+#----------------------------------------------------------------------------#
+
+import random
+import time
+
+from flask import Blueprint, current_app, request, g, has_request_context
+from flask_sqlalchemy.session import Session
+
+import db_pool
+
+REPLICA_BIND = 'replica_%d'
+COOKIE = 'fyyur_primary_until'
+
+bp = Blueprint('db_routing', __name__)
+
+def replicaBinds(config):
+  # SQLALCHEMY_BINDS entries of the replicas, and their pool statistics
+  binds, stats = {}, {}
+  for number, url in enumerate(config.get('DATABASE_REPLICA_URLS') or []):
+    key = REPLICA_BIND % number
+    stats[key] = db_pool.PoolStats(key)
+    binds[key] = dict(db_pool.engineOptions(config, url, stats[key]), url=url)
+  return binds, stats
+
+def readReplica(view):
+  # the view only reads: it may be answered from a replica
+  view.read_replica = True
+  return view
+
+def usePrimary():
+  # the rest of the current request reads from the primary
+  if has_request_context():
+    g.db_replica = None
+
+class RoutingSession(Session):
+
+  def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+    if bind is None and has_request_context():
+      if self._flushing or getattr(clause, 'is_dml', False):
+        g.db_wrote = True
+        usePrimary()
+      elif g.get('db_replica'):
+        return self._db.engines[g.db_replica]
+    return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+@bp.before_app_request
+def routeRequest():
+  replicas = current_app.extensions.get('replica_pool_stats')
+  view = current_app.view_functions.get(request.endpoint)
+  if not replicas or not getattr(view, 'read_replica', False):
+    return
+  try:
+    primary_until = float(request.cookies.get(COOKIE, 0))
+  except ValueError:
+    primary_until = 0
+  if primary_until < time.time():
+    g.db_replica = random.choice(list(replicas))
+
+@bp.after_app_request
+def rememberWrite(response):
+  seconds = current_app.config['READ_YOUR_WRITES_SECONDS']
+  if g.get('db_wrote') and current_app.extensions.get('replica_pool_stats') and seconds > 0:
+    view = current_app.view_functions.get(request.endpoint)
+    # counters refreshed by a read view are not the client's own write
+    if not getattr(view, 'read_replica', False):
+      response.set_cookie(COOKIE, '%.3f' % (time.time() + seconds), max_age=int(seconds) + 1, httponly=True)
+  return response
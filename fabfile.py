@@ -13,6 +13,11 @@ def test():
         abort("Aborted at user request.")
 
 
+def bench():
+    # per-route benchmark against the saved baseline (flask bench-routes --save)
+    local("flask bench-routes")
+
+
 def commit():
     message = raw_input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
@@ -0,0 +1,140 @@
+#----------------------------------------------------------------------------#
+# Response helpers of the blueprints: keyset pagination, streamed listings,
+# conditional GET validators and JSON responses.
+#----------------------------------------------------------------------------#
+
+import base64
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from flask import current_app, request, Response, abort, session, make_response, stream_with_context
+from sqlalchemy import tuple_
+from werkzeug.http import is_resource_modified
+
+from catalog import changeCounters, refreshShowCounters
+from models import db
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+#----------------------------------------------------------------------------#
+# Pagination.
+#----------------------------------------------------------------------------#
+
+# Keyset (cursor) pagination: a page is the PAGE_SIZE rows that sort after the
+# sort key of the last row of the previous page, so every page costs one
+# indexed range scan however deep the client has paged.
+def encodeCursor(values):
+  raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+  return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decodeCursor(cursor):
+  try:
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+  except ValueError:
+    abort(400)
+
+def keysetPage(query, columns, key, cursor_types, page_size=None):
+  # columns: the sort key, ending with a unique column; NOT NULL, since
+  # NULLs would drop out of the row-value comparison
+  # key: returns the sort key values of a result row
+  # cursor_types: converters applied to the decoded cursor values
+  cursor = request.args.get('after')
+  if cursor:
+    values = decodeCursor(cursor)
+    if not isinstance(values, list) or len(values) != len(columns):
+      abort(400)
+    try:
+      values = [None if v is None else t(v) for t, v in zip(cursor_types, values)]
+    except (TypeError, ValueError):
+      abort(400)
+    query = query.filter(tuple_(*columns) > tuple_(*values))
+  page_size = page_size or current_app.config['PAGE_SIZE']
+  rows = query.order_by(*columns).limit(page_size + 1).all()
+  next_cursor = encodeCursor(key(rows[page_size - 1])) if len(rows) > page_size else None
+  return rows[:page_size], next_cursor
+
+#----------------------------------------------------------------------------#
+# Streaming.
+#----------------------------------------------------------------------------#
+
+# Streaming mode of the listings (STREAM_LISTINGS): the whole listing is read
+# through a server-side cursor in STREAM_BATCH_ROWS batches and rendered by a
+# streamed template, so neither the rows nor the page are ever held in memory
+# as a whole. A deployment setting only: a full-table render is not something
+# any client may ask for.
+def streamListing():
+  return current_app.config['STREAM_LISTINGS']
+
+def streamRows(query):
+  return query.execution_options(yield_per=current_app.config['STREAM_BATCH_ROWS'])
+
+def streamTemplate(template_name, **context):
+  current_app.update_template_context(context)
+  stream = current_app.jinja_env.get_template(template_name).stream(**context)
+  # flush to the client every STREAM_BUFFER_SIZE template output pieces
+  stream.enable_buffering(current_app.config['STREAM_BUFFER_SIZE'])
+  return Response(stream_with_context(stream), mimetype='text/html')
+
+#----------------------------------------------------------------------------#
+# Conditional GET.
+#----------------------------------------------------------------------------#
+
+def makeETag(*parts):
+  return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+def entityValidators(model, entity_id):
+  row = db.session.query(model.updated_at, model.next_show_time).filter(model.id == entity_id).first()
+  if row is None:
+    abort(404)
+  updated_at, next_show_time = row
+  if next_show_time is not None and next_show_time <= datetime.now():
+    # a show moved from upcoming to past since the page last changed
+    refreshShowCounters(model, [entity_id], datetime.now())
+    db.session.commit()
+    updated_at = db.session.query(model.updated_at).filter(model.id == entity_id).scalar()
+  return makeETag(model.__tablename__, entity_id, updated_at), updated_at
+
+# tables: those the listing shows; their change counters are the validators
+def listingValidators(name, *tables):
+  counters = changeCounters(tables)
+  generations = [counters.get(table.name, (0, None))[0] for table in tables]
+  last_modified = max([changed_at for _, changed_at in counters.values() if changed_at is not None], default=None)
+  return makeETag(name, *generations), last_modified
+
+# Answers 304 when the client's copy is current, before any rendering work.
+# Listings only honour If-None-Match: their ETag covers the change counters of
+# every table shown, Last-Modified only the newest change.
+def notModified(etag, last_modified, listing=False):
+  if '_flashes' in session:
+    return None
+  if last_modified is not None and not listing:
+    # HTTP dates have whole seconds
+    last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+  else:
+    last_modified = None
+  if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+    return None
+  return withValidators(Response(status=304), etag, last_modified)
+
+def withValidators(body, etag, last_modified):
+  response = make_response(body)
+  response.set_etag(etag)
+  if last_modified is not None:
+    response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+  # always revalidate, the validators make that cheap
+  response.cache_control.no_cache = True
+  return response
+
+#----------------------------------------------------------------------------#
+# JSON.
+#----------------------------------------------------------------------------#
+
+def jsonResponse(payload, status=200):
+  if orjson is not None:
+    body = orjson.dumps(payload)
+  else:
+    body = json.dumps(payload, separators=(',', ':'))
+  return Response(body, status=status, mimetype='application/json')
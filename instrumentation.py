@@ -0,0 +1,170 @@
+#----------------------------------------------------------------------------#
+# Request metrics, the /metrics endpoint and per-route query budgets.
+#
+# The hooks are registered on the app by the `instrumentation` blueprint; the
+# registry (metrics.py) and the pool statistics (db_pool.py) of an app live
+# in app.extensions. Metrics of a request are recorded once its body is sent,
+# when the app context may already be gone, so the app is passed along.
+#----------------------------------------------------------------------------#
+
+import re
+import time
+
+from flask import Blueprint, current_app, request, Response, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from metrics import Metrics, LATENCY_BUCKETS, QUERY_BUCKETS
+
+bp = Blueprint('instrumentation', __name__)
+
+#----------------------------------------------------------------------------#
+# Metrics.
+#----------------------------------------------------------------------------#
+
+def createMetrics(config):
+  metrics = Metrics(config['METRICS_DIR'], config['METRICS_FLUSH_SECONDS'])
+  metrics.describe('fyyur_http_requests_total', 'counter', 'Requests answered, by route, method and status.')
+  metrics.describe('fyyur_http_request_duration_seconds', 'histogram', 'Request latency until the body is sent.', LATENCY_BUCKETS)
+  metrics.describe('fyyur_http_requests_in_flight', 'gauge', 'Requests being answered.')
+  metrics.describe('fyyur_db_queries_per_request', 'histogram', 'Database queries issued by a request.', QUERY_BUCKETS)
+  metrics.describe('fyyur_db_seconds_per_request', 'histogram', 'Time a request spent in database queries.', LATENCY_BUCKETS)
+  metrics.describe('fyyur_db_pool_connects_total', 'counter', 'Database connections opened.')
+  metrics.describe('fyyur_db_pool_checkouts_total', 'counter', 'Connections taken from the pool.')
+  metrics.describe('fyyur_db_pool_timeouts_total', 'counter', 'Checkouts that gave up waiting for a connection.')
+  metrics.describe('fyyur_db_pool_checkout_seconds_total', 'counter', 'Time spent getting a connection from the pool.')
+  metrics.describe('fyyur_db_pool_checked_out', 'gauge', 'Connections currently checked out.')
+  return metrics
+
+# route pattern, so /venues/1 and /venues/2 share their series
+def requestRoute():
+  return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@bp.before_app_request
+def startRequestMetrics():
+  g.metrics = {
+    'route': requestRoute(), 'method': request.method, 'start': time.perf_counter(), 'queries': 0, 'db_seconds': 0.0,
+    'shapes': {}, 'budget': queryBudgetOf(request.endpoint)
+  }
+  current_app.extensions['metrics'].inc('fyyur_http_requests_in_flight', route=g.metrics['route'])
+
+@bp.after_app_request
+def recordRequestMetrics(response):
+  state = g.get('metrics')
+  if state is None:
+    return response
+  app = current_app._get_current_object()
+  if not response.is_streamed and not state.get('budget_checked'):
+    # every query is issued by now: in 'raise' mode an overrun fails this
+    # request, whose error response comes back through here
+    state['budget_checked'] = True
+    checkQueryBudget(app, state)
+  # streamed listings are still rendering here: record once the body is sent
+  response.call_on_close(lambda: finishRequestMetrics(app, state, response.status_code))
+  return response
+
+def finishRequestMetrics(app, state, status):
+  metrics = app.extensions['metrics']
+  route = state['route']
+  metrics.inc('fyyur_http_requests_in_flight', -1, route=route)
+  metrics.inc('fyyur_http_requests_total', route=route, method=state['method'], status=status)
+  metrics.observe('fyyur_http_request_duration_seconds', time.perf_counter() - state['start'], route=route, method=state['method'])
+  metrics.observe('fyyur_db_queries_per_request', state['queries'], route=route)
+  metrics.observe('fyyur_db_seconds_per_request', state['db_seconds'], route=route)
+  syncPoolMetrics(app)
+  metrics.flush()
+  if not state.get('budget_checked'):
+    checkQueryBudget(app, state)
+
+def syncPoolMetrics(app):
+  metrics = app.extensions['metrics']
+  snapshot = app.extensions['pool_stats'].snapshot()
+  metrics.set('fyyur_db_pool_connects_total', snapshot['connects'])
+  metrics.set('fyyur_db_pool_checkouts_total', snapshot['checkouts'])
+  metrics.set('fyyur_db_pool_timeouts_total', snapshot['timeouts'])
+  metrics.set('fyyur_db_pool_checkout_seconds_total', snapshot['checkout_seconds_total'])
+  metrics.set('fyyur_db_pool_checked_out', snapshot['checked_out'])
+
+# queries and their time, counted against the request issuing them
+@event.listens_for(Engine, 'before_cursor_execute')
+def startQueryTimer(conn, cursor, statement, parameters, context, executemany):
+  conn.info.setdefault('query_start', []).append((context, time.perf_counter()))
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def stopQueryTimer(conn, cursor, statement, parameters, context, executemany):
+  elapsed = time.perf_counter() - conn.info['query_start'].pop()[1]
+  if has_request_context() and 'metrics' in g:
+    state = g.metrics
+  else:
+    # statements of the async engine run on its own thread, see requestMetrics()
+    state = conn.get_execution_options().get('request_metrics')
+  if state is not None:
+    state['queries'] += 1
+    state['db_seconds'] += elapsed
+    shape = statementShape(statement)
+    state['shapes'][shape] = state['shapes'].get(shape, 0) + 1
+
+# Metrics state of the current request, for connections that run outside it
+# (async_db.py): connection.execution_options(request_metrics=...).
+def requestMetrics():
+  return g.get('metrics') if has_request_context() else None
+
+# a failed statement never reaches after_cursor_execute: drop its start time
+@event.listens_for(Engine, 'handle_error')
+def dropQueryTimer(exception_context):
+  connection = exception_context.connection
+  timers = connection.info.get('query_start') if connection is not None else None
+  if timers and timers[-1][0] is exception_context.execution_context:
+    timers.pop()
+
+#----------------------------------------------------------------------------#
+# Query budgets.
+#----------------------------------------------------------------------------#
+
+# A route declares how many queries a request may issue, and a statement
+# repeated QUERY_REPEAT_THRESHOLD times in one request is reported as a
+# likely N+1. QUERY_BUDGET_ACTION 'log' writes a warning, 'raise' fails the
+# request (tests), 'off' does nothing. Streamed responses are checked once
+# their body is sent, too late to fail them: there 'raise' raises from the
+# response's close().
+
+class QueryBudgetExceeded(Exception):
+  pass
+
+def queryBudget(limit):
+  def declare(view):
+    view.query_budget = limit
+    return view
+  return declare
+
+def queryBudgetOf(endpoint):
+  view = current_app.view_functions.get(endpoint)
+  return getattr(view, 'query_budget', None)
+
+# one shape for a statement whatever the length of its expanded IN lists
+PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:\?|%\([^)]*\)s|%s|:\w+|\$\d+)\s*,)*\s*(?:\?|%\([^)]*\)s|%s|:\w+|\$\d+)\s*\)')
+def statementShape(statement):
+  return ' '.join(PLACEHOLDER_LIST.sub('(?)', statement).split())
+
+def checkQueryBudget(app, state):
+  action = app.config['QUERY_BUDGET_ACTION']
+  if action == 'off':
+    return
+  problems = []
+  if state['budget'] is not None and state['queries'] > state['budget']:
+    problems.append('%d queries, budget %d' % (state['queries'], state['budget']))
+  for shape, count in state['shapes'].items():
+    if count >= app.config['QUERY_REPEAT_THRESHOLD']:
+      problems.append('%d x %s' % (count, shape[:200]))
+  if len(problems) == 0:
+    return
+  message = '%s %s: %s' % (state['method'], state['route'], '; '.join(problems))
+  if action == 'raise':
+    raise QueryBudgetExceeded(message)
+  app.logger.warning('query budget: %s', message)
+
+@bp.route('/metrics')
+def metrics_endpoint():
+  app = current_app._get_current_object()
+  syncPoolMetrics(app)
+  return Response(app.extensions['metrics'].render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,253 @@
+#----------------------------------------------------------------------------#
+# Concurrent load generator for a running Fyyur instance.
+#
+# `concurrency` asyncio workers each keep one HTTP/1.1 keep-alive
+# connection and send requests back to back for `duration` seconds, picking
+# the route of every request from a weighted mix of reads and writes. The
+# report gives, per route, the throughput, the p50/p95/p99 latency and the
+# error rate (connection errors and 4xx/5xx answers).
+#
+# Local only: the target must be a loopback address. The write routes
+# create shows and overwrite artists, so point it at a throwaway database
+# (see `flask seed-catalog`).
+#
+#   python load_generator.py --url http://127.0.0.1:5000 --duration 30 \
+#       --concurrency 32 --mix venues=3,artist=3,shows=2,venue_search=1,show_create=1
+#----------------------------------------------------------------------------#
+
+import asyncio
+import ipaddress
+import json
+import random
+import socket
+import time
+from urllib.parse import urlencode, urlsplit
+
+import click
+
+# route -> weight in the default mix
+DEFAULT_MIX = {
+  'venues': 20, 'artist': 20, 'shows': 20, 'venue_search': 10, 'artist_search': 10,
+  'show_create': 5, 'artist_edit': 5,
+}
+SEARCH_TERMS = ['a', 'band', 'blue', 'hall', 'the', 'jazz', 'club', 'wild']
+
+def requestsFor(route, rng, ids):
+  # (method, path, form data or None) of one request
+  if route == 'venues':
+    return 'GET', '/venues', None
+  if route == 'artist':
+    return 'GET', '/artists/%d' % rng.choice(ids['artists']), None
+  if route == 'shows':
+    return 'GET', '/shows', None
+  if route == 'venue_search':
+    return 'POST', '/venues/search', {'search_term': rng.choice(SEARCH_TERMS)}
+  if route == 'artist_search':
+    return 'POST', '/artists/search', {'search_term': rng.choice(SEARCH_TERMS)}
+  if route == 'show_create':
+    return 'POST', '/shows/create', {
+      'artist_id': rng.choice(ids['artists']), 'venue_id': rng.choice(ids['venues']),
+      'start_time': '2031-%02d-%02d 20:00:00' % (rng.randint(1, 12), rng.randint(1, 28)),
+    }
+  if route == 'artist_edit':
+    artist_id = rng.choice(ids['artists'])
+    return 'POST', '/artists/%d/edit' % artist_id, {
+      'name': 'Load Artist %d' % artist_id, 'city': 'San Francisco', 'state': 'CA',
+      'phone': '415-000-0000', 'genres': ['Jazz'], 'facebook_link': 'https://www.facebook.com/load',
+    }
+  raise click.BadParameter('unknown route %r, expected one of %s' % (route, ', '.join(DEFAULT_MIX)))
+
+#----------------------------------------------------------------------------#
+# A minimal HTTP/1.1 client over asyncio streams.
+
+class Connection:
+
+  def __init__(self, host, port):
+    self.host = host
+    self.port = port
+    self.reader = None
+    self.writer = None
+
+  async def request(self, method, path, form=None):
+    # returns the status code and the body
+    if self.writer is None:
+      self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+    body = urlencode(form, doseq=True).encode() if form is not None else b''
+    head = '%s %s HTTP/1.1\r\nHost: %s:%d\r\nContent-Length: %d\r\n' % (
+      method, path, self.host, self.port, len(body))
+    if form is not None:
+      head += 'Content-Type: application/x-www-form-urlencoded\r\n'
+    self.writer.write(head.encode() + b'\r\n' + body)
+    try:
+      version, status, headers = await self.readHead()
+      keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+      if method == 'HEAD' or status in (204, 304):
+        content = b''
+      elif headers.get('transfer-encoding', '').lower() == 'chunked':
+        content = await self.readChunked()
+      elif 'content-length' in headers:
+        content = await self.reader.readexactly(int(headers['content-length']))
+      else:
+        # the body ends with the connection
+        content = await self.reader.read()
+        keep_alive = False
+    except (asyncio.IncompleteReadError, ConnectionError):
+      self.close()
+      raise
+    if not keep_alive:
+      self.close()
+    return status, content
+
+  async def readHead(self):
+    status_line = (await self.reader.readuntil(b'\r\n')).decode('latin-1').split()
+    if len(status_line) < 2:
+      raise ConnectionError('connection closed by the server')
+    headers = {}
+    while True:
+      line = await self.reader.readuntil(b'\r\n')
+      if line == b'\r\n':
+        break
+      name, _, value = line.decode('latin-1').partition(':')
+      headers[name.strip().lower()] = value.strip()
+    return status_line[0], int(status_line[1]), headers
+
+  async def readChunked(self):
+    chunks = []
+    while True:
+      size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+      chunks.append((await self.reader.readexactly(size + 2))[:-2])
+      if size == 0:
+        return b''.join(chunks)
+
+  def close(self):
+    if self.writer is not None:
+      self.writer.close()
+    self.reader = self.writer = None
+
+#----------------------------------------------------------------------------#
+# Load.
+
+class Results:
+
+  def __init__(self):
+    self.latencies = {}  # route -> [seconds]
+    self.errors = {}     # route -> count
+    self.statuses = {}   # route -> {status: count}
+
+  def record(self, route, seconds, status):
+    self.latencies.setdefault(route, []).append(seconds)
+    counts = self.statuses.setdefault(route, {})
+    counts[status] = counts.get(status, 0) + 1
+    if status is None or status >= 400:
+      self.errors[route] = self.errors.get(route, 0) + 1
+
+  def report(self, elapsed):
+    rows = {}
+    for route in sorted(self.latencies):
+      latencies = sorted(self.latencies[route])
+      rows[route] = {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2),
+        'error_rate': round(self.errors.get(route, 0) / len(latencies), 4),
+        'statuses': {str(k): v for k, v in self.statuses[route].items()},
+      }
+    every = sorted(s for latencies in self.latencies.values() for s in latencies)
+    if every:
+      rows['total'] = {
+        'requests': len(every),
+        'rps': round(len(every) / elapsed, 1),
+        'p50_ms': round(_percentile(every, 0.50) * 1000, 2),
+        'p95_ms': round(_percentile(every, 0.95) * 1000, 2),
+        'p99_ms': round(_percentile(every, 0.99) * 1000, 2),
+        'error_rate': round(sum(self.errors.values()) / len(every), 4),
+      }
+    return rows
+
+def _percentile(ordered, fraction):
+  return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+async def worker(number, host, port, mix, ids, deadline, seed, timeout, results):
+  rng = random.Random(seed * 1000 + number)
+  routes, weights = list(mix), list(mix.values())
+  connection = Connection(host, port)
+  while time.monotonic() < deadline:
+    route = rng.choices(routes, weights)[0]
+    method, path, form = requestsFor(route, rng, ids)
+    start = time.perf_counter()
+    try:
+      status = (await asyncio.wait_for(connection.request(method, path, form), timeout))[0]
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+      connection.close()
+      status = None
+    results.record(route, time.perf_counter() - start, status)
+  connection.close()
+
+async def fetchIds(host, port, path):
+  connection = Connection(host, port)
+  status, body = await connection.request('GET', path)
+  connection.close()
+  if status != 200:
+    raise click.ClickException('GET %s answered %d' % (path, status))
+  return [row['id'] for row in json.loads(body)['data']]
+
+async def run(url, duration, concurrency, mix, seed, timeout):
+  parts = urlsplit(url)
+  host, port = parts.hostname, parts.port or 80
+  ids = {
+    'venues': await fetchIds(host, port, '/api/v1/venues?fields=id&limit=500'),
+    'artists': await fetchIds(host, port, '/api/v1/artists?fields=id&limit=500'),
+  }
+  if not ids['venues'] or not ids['artists']:
+    raise click.ClickException('the catalog is empty, seed it first (flask seed-catalog)')
+  results = Results()
+  start = time.monotonic()
+  await asyncio.gather(*[
+    worker(n, host, port, mix, ids, start + duration, seed, timeout, results) for n in range(concurrency)
+  ])
+  return results.report(time.monotonic() - start)
+
+def localOnly(url):
+  parts = urlsplit(url)
+  if parts.scheme != 'http' or not parts.hostname:
+    raise click.BadParameter('expected http://host:port', param_hint='--url')
+  try:
+    addresses = socket.getaddrinfo(parts.hostname, parts.port or 80)
+  except socket.gaierror as error:
+    raise click.BadParameter('%s: %s' % (parts.hostname, error), param_hint='--url')
+  for family, _, _, _, address in addresses:
+    if not ipaddress.ip_address(address[0]).is_loopback:
+      raise click.BadParameter('%s is not a loopback address' % parts.hostname, param_hint='--url')
+
+def parseMix(value):
+  mix = {}
+  for item in value.split(','):
+    route, _, weight = item.partition('=')
+    requestsFor(route.strip(), random.Random(0), {'artists': [1], 'venues': [1]})
+    mix[route.strip()] = float(weight or 1)
+  return mix
+
+@click.command()
+@click.option('--url', default='http://127.0.0.1:5000', show_default=True, help='Running instance, loopback only.')
+@click.option('--duration', default=30.0, show_default=True, help='Seconds of load.')
+@click.option('--concurrency', default=16, show_default=True, help='Concurrent connections.')
+@click.option('--mix', default=','.join('%s=%d' % item for item in DEFAULT_MIX.items()), show_default=True,
+              help='route=weight, comma-separated.')
+@click.option('--seed', default=1, show_default=True)
+@click.option('--timeout', default=30.0, show_default=True, help='Seconds before a request counts as an error.')
+@click.option('--json', 'json_path', default=None, help='Also write the report to this file.')
+def main(url, duration, concurrency, mix, seed, timeout, json_path):
+  localOnly(url)
+  report = asyncio.run(run(url, duration, concurrency, parseMix(mix), seed, timeout))
+  click.echo('%-14s %9s %8s %9s %9s %9s %7s' % ('route', 'requests', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'errors'))
+  for route, row in report.items():
+    click.echo('%-14s %9d %8.1f %9.2f %9.2f %9.2f %6.2f%%' % (
+      route, row['requests'], row['rps'], row['p50_ms'], row['p95_ms'], row['p99_ms'], row['error_rate'] * 100))
+  if json_path:
+    with open(json_path, 'w') as f:
+      json.dump({'url': url, 'duration': duration, 'concurrency': concurrency, 'report': report}, f, indent=2)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,143 @@
+#----------------------------------------------------------------------------#
+# Request and database metrics in the Prometheus text format.
+#
+# Counters, gauges and histograms live in a per-process registry. With a
+# shared directory (METRICS_DIR) every worker process writes its registry to
+# <dir>/<pid>.json at most every `flush_seconds`, and collect() merges the
+# files of all workers: counters and histograms are summed, gauges are
+# summed over the processes still alive. Without a directory only the
+# process answering /metrics is reported.
+#----------------------------------------------------------------------------#
+
+import atexit
+import json
+import os
+import threading
+import time
+
+# request latency, seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# database queries issued by one request
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+def _labels(labels):
+  return tuple(sorted(labels.items()))
+
+def _escape(value):
+  return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _formatLabels(labels, extra=()):
+  pairs = list(labels) + list(extra)
+  if not pairs:
+    return ''
+  return '{%s}' % ','.join('%s="%s"' % (k, _escape(v)) for k, v in pairs)
+
+def _alive(pid):
+  try:
+    os.kill(pid, 0)
+  except ProcessLookupError:
+    return False
+  except PermissionError:
+    pass
+  return True
+
+class Metrics:
+
+  def __init__(self, directory=None, flush_seconds=5):
+    self.directory = directory
+    self.flush_seconds = flush_seconds
+    self.lock = threading.Lock()
+    self.described = {}  # name -> (type, help, buckets)
+    self.values = {}     # (name, labels) -> number, or bucket counts + [sum, count]
+    self.flushed_at = 0
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+      atexit.register(self.flush, True)
+
+  def describe(self, name, kind, help, buckets=None):
+    # kind: 'counter', 'gauge' or 'histogram'
+    self.described[name] = (kind, help, buckets)
+
+  def inc(self, name, value=1, **labels):
+    key = (name, _labels(labels))
+    with self.lock:
+      self.values[key] = self.values.get(key, 0) + value
+
+  def set(self, name, value, **labels):
+    with self.lock:
+      self.values[(name, _labels(labels))] = value
+
+  def observe(self, name, value, **labels):
+    buckets = self.described[name][2]
+    key = (name, _labels(labels))
+    with self.lock:
+      counts = self.values.get(key)
+      if counts is None:
+        counts = self.values[key] = [0] * (len(buckets) + 3)
+      for i, bound in enumerate(buckets):
+        if value <= bound:
+          counts[i] += 1
+          break
+      else:
+        counts[len(buckets)] += 1  # +Inf
+      counts[-2] += value
+      counts[-1] += 1
+
+  def state(self):
+    with self.lock:
+      return [[name, [list(p) for p in labels], value] for (name, labels), value in self.values.items()]
+
+  def flush(self, force=False):
+    if not self.directory or (not force and time.monotonic() - self.flushed_at < self.flush_seconds):
+      return
+    self.flushed_at = time.monotonic()
+    path = os.path.join(self.directory, '%d.json' % os.getpid())
+    with open(path + '.tmp', 'w') as f:
+      json.dump(self.state(), f)
+    os.replace(path + '.tmp', path)
+
+  def collect(self):
+    # merged (name, labels) -> value of all processes
+    if not self.directory:
+      return {(name, tuple(map(tuple, labels))): value for name, labels, value in self.state()}
+    self.flush(True)
+    merged = {}
+    for filename in os.listdir(self.directory):
+      if not filename.endswith('.json'):
+        continue
+      try:
+        with open(os.path.join(self.directory, filename)) as f:
+          entries = json.load(f)
+      except (OSError, ValueError):
+        continue
+      alive = _alive(int(filename[:-5]))
+      for name, labels, value in entries:
+        if name not in self.described or (self.described[name][0] == 'gauge' and not alive):
+          continue
+        key = (name, tuple(map(tuple, labels)))
+        if isinstance(value, list):
+          current = merged.get(key)
+          merged[key] = value if current is None else [a + b for a, b in zip(current, value)]
+        else:
+          merged[key] = merged.get(key, 0) + value
+    return merged
+
+  def render(self):
+    values = self.collect()
+    lines = []
+    for name, (kind, help, buckets) in self.described.items():
+      lines.append('# HELP %s %s' % (name, help))
+      lines.append('# TYPE %s %s' % (name, kind))
+      for (metric, labels), value in sorted(values.items()):
+        if metric != name:
+          continue
+        if kind != 'histogram':
+          lines.append('%s%s %s' % (name, _formatLabels(labels), value))
+          continue
+        cumulative = 0
+        for bound, count in zip(list(buckets) + ['+Inf'], value):
+          cumulative += count
+          lines.append('%s_bucket%s %d' % (name, _formatLabels(labels, [('le', bound)]), cumulative))
+        lines.append('%s_sum%s %s' % (name, _formatLabels(labels), value[-2]))
+        lines.append('%s_count%s %d' % (name, _formatLabels(labels), value[-1]))
+    return '\n'.join(lines) + '\n'
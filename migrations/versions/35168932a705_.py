@@ -0,0 +1,45 @@
+"""maintained upcoming/past show counters on Venue and Artist
+
+Revision ID: 35168932a705
+Revises: c4dcee72f130
+Create Date: 2026-10-18 10:03:17.224905
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '35168932a705'
+down_revision = 'c4dcee72f130'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table, key in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('next_show_time', sa.DateTime(), nullable=True))
+            batch_op.create_index(batch_op.f('ix_{}_next_show_time'.format(table)), ['next_show_time'], unique=False)
+
+        # backfill from the existing shows
+        op.execute(sa.text(
+            'UPDATE "{table}" SET '
+            'upcoming_shows_count = (SELECT count(*) FROM show WHERE show.{key} = "{table}".id AND show.start_time > :now), '
+            'past_shows_count = (SELECT count(*) FROM show WHERE show.{key} = "{table}".id AND show.start_time <= :now), '
+            'next_show_time = (SELECT min(show.start_time) FROM show WHERE show.{key} = "{table}".id AND show.start_time > :now)'
+            .format(table=table, key=key)
+        ).bindparams(now=datetime.now()))
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f('ix_{}_next_show_time'.format(table)))
+            batch_op.drop_column('next_show_time')
+            batch_op.drop_column('past_shows_count')
+            batch_op.drop_column('upcoming_shows_count')
@@ -0,0 +1,92 @@
+"""Genre table with venue_genre and artist_genre replacing the genres strings
+
+Revision ID: 4e1f7a9c2d60
+Revises: 99fb68a1d6a3
+Create Date: 2026-10-18 15:02:11.408316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e1f7a9c2d60'
+down_revision = '99fb68a1d6a3'
+branch_labels = None
+depends_on = None
+
+# forms.GENRES at the time of this revision
+GENRES = [
+    'Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk', 'Funk', 'Hip-Hop',
+    'Heavy Metal', 'Instrumental', 'Jazz', 'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae',
+    'Rock n Roll', 'Soul', 'Other'
+]
+
+LINKS = (('Venue', 'venue_genre', 'venue_id'), ('Artist', 'artist_genre', 'artist_id'))
+
+
+def split(value):
+    return list(dict.fromkeys(g.strip() for g in (value or '').split(',') if g.strip()))
+
+
+def upgrade():
+    genre = op.create_table('Genre',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    for table, link, key in LINKS:
+        op.create_table(link,
+            sa.Column(key, sa.Integer(), nullable=False),
+            sa.Column('genre_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint([key], ['{}.id'.format(table)], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['genre_id'], ['Genre.id']),
+            sa.PrimaryKeyConstraint(key, 'genre_id')
+        )
+        op.create_index('ix_{}_genre_id_{}'.format(link, key), link, ['genre_id', key], unique=False)
+
+    # the comma-joined strings become rows; names outside GENRES are kept
+    connection = op.get_bind()
+    current = {}
+    for table, link, key in LINKS:
+        current[table] = [
+            (row[0], split(row[1]))
+            for row in connection.execute(sa.text('SELECT id, genres FROM "{}"'.format(table)))
+        ]
+    names = list(GENRES)
+    for rows in current.values():
+        for _, genres in rows:
+            names.extend(g for g in genres if g not in names)
+    op.bulk_insert(genre, [{'name': name} for name in names])
+    genre_ids = dict(connection.execute(sa.text('SELECT name, id FROM "Genre"')).fetchall())
+    for table, link, key in LINKS:
+        links = [{key: entity_id, 'genre_id': genre_ids[name]} for entity_id, genres in current[table] for name in genres]
+        if links:
+            connection.execute(
+                sa.text('INSERT INTO {} ({}, genre_id) VALUES (:{}, :genre_id)'.format(link, key, key)), links
+            )
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('genres')
+
+
+def downgrade():
+    connection = op.get_bind()
+    for table, link, key in LINKS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('genres', sa.String(length=120), nullable=True))
+        joined = {}
+        for entity_id, name in connection.execute(sa.text(
+            'SELECT l.{}, g.name FROM {} l JOIN "Genre" g ON g.id = l.genre_id ORDER BY l.{}, g.name'
+            .format(key, link, key)
+        )):
+            joined.setdefault(entity_id, []).append(name)
+        for entity_id, genres in joined.items():
+            # the old column holds 120 characters
+            connection.execute(
+                sa.text('UPDATE "{}" SET genres = :genres WHERE id = :id'.format(table)),
+                {'genres': ', '.join(genres)[:120], 'id': entity_id}
+            )
+        op.drop_index('ix_{}_genre_id_{}'.format(link, key), table_name=link)
+        op.drop_table(link)
+    op.drop_table('Genre')
@@ -0,0 +1,40 @@
+"""NOT NULL keyset sort columns: Venue.city, Venue.state and show.start_time
+
+Rows with a NULL in a sort key would be skipped by the row-value comparison
+of the paginated listings. Venues without a city or state get ''; shows
+without a start time cannot be rendered by any page and are deleted.
+
+Revision ID: 5b2d7e9a0c14
+Revises: 4e1f7a9c2d60
+Create Date: 2026-10-18 19:41:27.118503
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2d7e9a0c14'
+down_revision = '4e1f7a9c2d60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    connection = op.get_bind()
+    for column in ('city', 'state'):
+        connection.execute(sa.text('UPDATE "Venue" SET {0} = \'\' WHERE {0} IS NULL'.format(column)))
+    connection.execute(sa.text('DELETE FROM show WHERE start_time IS NULL'))
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.alter_column('city', existing_type=sa.String(length=120), nullable=False)
+        batch_op.alter_column('state', existing_type=sa.String(length=120), nullable=False)
+    with op.batch_alter_table('show', schema=None) as batch_op:
+        batch_op.alter_column('start_time', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('show', schema=None) as batch_op:
+        batch_op.alter_column('start_time', existing_type=sa.DateTime(), nullable=True)
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.alter_column('state', existing_type=sa.String(length=120), nullable=True)
+        batch_op.alter_column('city', existing_type=sa.String(length=120), nullable=True)
@@ -0,0 +1,26 @@
+"""indexes for the keyset-paginated venue and show listings
+
+Revision ID: 8d0e0f6b2a51
+Revises: ef40b699d6fd
+Create Date: 2026-10-18 11:26:09.331760
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d0e0f6b2a51'
+down_revision = 'ef40b699d6fd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Venue_city_state_id', 'Venue', ['city', 'state', 'id'], unique=False)
+    op.create_index('ix_show_start_time_artist_id_venue_id', 'show', ['start_time', 'artist_id', 'venue_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_show_start_time_artist_id_venue_id', table_name='show')
+    op.drop_index('ix_Venue_city_state_id', table_name='Venue')
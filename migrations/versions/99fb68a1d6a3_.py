@@ -0,0 +1,36 @@
+"""updated_at on Venue, Artist and show for conditional GET
+
+Revision ID: 99fb68a1d6a3
+Revises: 8d0e0f6b2a51
+Create Date: 2026-10-18 12:48:30.119852
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '99fb68a1d6a3'
+down_revision = '8d0e0f6b2a51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for table, indexed in (('Venue', True), ('Artist', True), ('show', False)):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+            if indexed:
+                batch_op.create_index(batch_op.f('ix_{}_updated_at'.format(table)), ['updated_at'], unique=False)
+        op.execute(sa.text('UPDATE "{}" SET updated_at = :now'.format(table)).bindparams(now=now))
+
+
+def downgrade():
+    for table, indexed in (('show', False), ('Artist', True), ('Venue', True)):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            if indexed:
+                batch_op.drop_index(batch_op.f('ix_{}_updated_at'.format(table)))
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,38 @@
+"""show.start_time as a timestamp, indexed per venue and per artist
+
+Revision ID: c4dcee72f130
+Revises: ff6eadecf75a
+Create Date: 2026-10-18 09:12:41.503318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4dcee72f130'
+down_revision = 'ff6eadecf75a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('show', schema=None) as batch_op:
+        batch_op.alter_column('start_time',
+               existing_type=sa.String(length=120),
+               type_=sa.DateTime(),
+               existing_nullable=True,
+               postgresql_using='start_time::timestamp without time zone')
+        batch_op.create_index('ix_show_venue_id_start_time', ['venue_id', 'start_time'], unique=False)
+        batch_op.create_index('ix_show_artist_id_start_time', ['artist_id', 'start_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('show', schema=None) as batch_op:
+        batch_op.drop_index('ix_show_artist_id_start_time')
+        batch_op.drop_index('ix_show_venue_id_start_time')
+        batch_op.alter_column('start_time',
+               existing_type=sa.DateTime(),
+               type_=sa.String(length=120),
+               existing_nullable=True,
+               postgresql_using='start_time::varchar')
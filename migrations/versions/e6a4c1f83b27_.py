@@ -0,0 +1,35 @@
+"""change_counter: change generations of the tables shown by the listings
+
+Revision ID: e6a4c1f83b27
+Revises: 5b2d7e9a0c14
+Create Date: 2026-10-18 20:17:52.640981
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a4c1f83b27'
+down_revision = '5b2d7e9a0c14'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist', 'show')
+
+
+def upgrade():
+    counter = op.create_table('change_counter',
+        sa.Column('table_name', sa.String(length=64), nullable=False),
+        sa.Column('generation', sa.BigInteger(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    op.bulk_insert(counter, [{'table_name': name, 'generation': 1, 'changed_at': now} for name in TABLES])
+
+
+def downgrade():
+    op.drop_table('change_counter')
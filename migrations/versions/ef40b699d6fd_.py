@@ -0,0 +1,35 @@
+"""trigram indexes for the venue and artist name search
+
+Revision ID: ef40b699d6fd
+Revises: 35168932a705
+Create Date: 2026-10-18 10:41:55.870126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ef40b699d6fd'
+down_revision = '35168932a705'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_Venue_name_trgm', 'Venue', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+        op.create_index('ix_Artist_name_trgm', 'Artist', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    else:
+        # no trigram support (e.g. SQLite for local testing): a plain index
+        # keeps the schema in step with the models
+        op.create_index('ix_Venue_name_trgm', 'Venue', ['name'], unique=False)
+        op.create_index('ix_Artist_name_trgm', 'Artist', ['name'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Artist_name_trgm', table_name='Artist')
+    op.drop_index('ix_Venue_name_trgm', table_name='Venue')
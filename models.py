@@ -0,0 +1,128 @@
+#----------------------------------------------------------------------------#
+# Models.
+#
+# The SQLAlchemy extension is created unbound and attached to the app by
+# create_app() (app.py), so importing the models does not build an app or
+# an engine.
+#----------------------------------------------------------------------------#
+
+import sqlite3
+from datetime import datetime, timezone
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import Identity, event
+from sqlalchemy.engine import Engine
+
+from db_routing import RoutingSession
+
+# sessions route the reads of @readReplica views to a replica (db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# SQLite checks the foreign keys only on connections that ask for it
+@event.listens_for(Engine, 'connect')
+def enableForeignKeys(dbapi_connection, connection_record):
+  if isinstance(dbapi_connection, sqlite3.Connection):
+    dbapi_connection.execute('PRAGMA foreign_keys=ON')
+
+# updated_at columns hold naive UTC times
+def utcNow():
+  return datetime.now(timezone.utc).replace(tzinfo=None)
+
+#----------------------------------------------------------------------------#
+Show = db.Table('show', 
+  db.Column('artist_id',db.Integer, db.ForeignKey('Artist.id'), primary_key = True),
+  db.Column('venue_id',db.Integer, db.ForeignKey('Venue.id'), primary_key = True),
+  db.Column('start_time', db.DateTime, nullable=False),
+  db.Column('updated_at', db.DateTime, default=lambda: utcNow()),
+  db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+  db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+  db.Index('ix_show_start_time_artist_id_venue_id', 'start_time', 'artist_id', 'venue_id')
+)
+
+# Change counter of each table a listing page shows, bumped by every
+# transaction writing to it (catalog.py); the listing validators read these
+# rows instead of aggregating the tables.
+ChangeCounter = db.Table('change_counter',
+  db.Column('table_name', db.String(64), primary_key = True),
+  db.Column('generation', db.BigInteger, nullable=False, default=0),
+  db.Column('changed_at', db.DateTime, nullable=False, default=lambda: utcNow())
+)
+
+# genres of venues and artists; (genre_id, venue_id|artist_id) serve the
+# by-genre listings and search filters
+venue_genre = db.Table('venue_genre',
+  db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), primary_key = True),
+  db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'), primary_key = True),
+  db.Index('ix_venue_genre_genre_id_venue_id', 'genre_id', 'venue_id')
+)
+
+artist_genre = db.Table('artist_genre',
+  db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), primary_key = True),
+  db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'), primary_key = True),
+  db.Index('ix_artist_genre_genre_id_artist_id', 'genre_id', 'artist_id')
+)
+
+#----------------------------------------------------------------------------#
+class Genre(db.Model):
+    __tablename__ = 'Genre'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+#----------------------------------------------------------------------------#
+class Venue(db.Model):
+    __tablename__ = 'Venue'
+    __table_args__ = (
+      db.Index('ix_Venue_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+      db.Index('ix_Venue_city_state_id', 'city', 'state', 'id'),
+    )
+    id = db.Column(
+      db.Integer,Identity(start=1, increment=1,minvalue=1,nomaxvalue=True ,cycle=True) ,primary_key=True)
+    name = db.Column(db.String)
+    # keyset sort key of /venues, see keysetPage()
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    address = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    genres = db.relationship('Genre', secondary=venue_genre, order_by='Genre.name')
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120))
+    website = db.Column(db.String(120))
+    seeking_talent = db.Column(db.Boolean, nullable=False, default=False)
+    seeking_description = db.Column(db.String(300))
+    # maintained show counters, see refreshShowCounters()
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime, index=True)
+    # last change of anything rendered on the entity page, see touchEntities()
+    updated_at = db.Column(db.DateTime, index=True, default=lambda: utcNow(), onupdate=lambda: utcNow())
+    # TODO: implement any missing fields, as a database migration using Flask-Migrate
+
+class Artist(db.Model):
+    __tablename__ = 'Artist'
+    __table_args__ = (
+      db.Index('ix_Artist_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+    id = db.Column(
+      db.Integer, Identity(start=1, increment=1,minvalue=1,nomaxvalue=True ,cycle=True) ,primary_key=True)
+    name = db.Column(db.String)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    genres = db.relationship('Genre', secondary=artist_genre, order_by='Genre.name')
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120))
+    website = db.Column(db.String(120))
+    seeking_description = db.Column(db.String(120))
+    seeking_venue = db.Column(db.Boolean(), default = True)
+    # maintained show counters, see refreshShowCounters()
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime, index=True)
+    # last change of anything rendered on the entity page, see touchEntities()
+    updated_at = db.Column(db.DateTime, index=True, default=lambda: utcNow(), onupdate=lambda: utcNow())
+    venue_id = db.relationship('Venue',secondary = Show, backref=db.backref('Artist', lazy=True))
+    # TODO: implement any missing fields, as a database migration using Flask-Migrate
+
+# TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
+# app.app_context().push()
+# db.create_all()
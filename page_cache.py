@@ -0,0 +1,82 @@
+#----------------------------------------------------------------------------#
+# Rendered-page cache.
+#
+# Keys are plain strings that include the page's validator ('venue:1:<etag>',
+# ...): a write moves the ETag, the next request misses and renders the page
+# afresh, and the old entry ages out through LRU eviction or its TTL. Nothing
+# is deleted on a write, so every worker and CLI process stays correct
+# without hearing of the others' writes.
+#
+# Backends: MemoryBackend (per process, default) and RedisBackend (shared by
+# all workers, needs the optional `redis` package).
+#----------------------------------------------------------------------------#
+
+import threading
+import time
+from collections import OrderedDict
+
+class MemoryBackend:
+
+  def __init__(self, max_entries=1024):
+    self.max_entries = max_entries
+    self.entries = OrderedDict()  # key -> (expires_at, value)
+    self.lock = threading.Lock()
+
+  def get(self, key):
+    with self.lock:
+      item = self.entries.get(key)
+      if item is None:
+        return None
+      if item[0] <= time.monotonic():
+        del self.entries[key]
+        return None
+      self.entries.move_to_end(key)
+      return item[1]
+
+  def set(self, key, value, ttl):
+    with self.lock:
+      self.entries[key] = (time.monotonic() + ttl, value)
+      self.entries.move_to_end(key)
+      while len(self.entries) > self.max_entries:
+        self.entries.popitem(last=False)
+
+class RedisBackend:
+
+  def __init__(self, url, prefix='fyyur:page:'):
+    import redis
+    self.client = redis.Redis.from_url(url)
+    self.prefix = prefix
+
+  def get(self, key):
+    value = self.client.get(self.prefix + key)
+    return value.decode() if value is not None else None
+
+  def set(self, key, value, ttl):
+    # size bound: configure the server with a maxmemory-policy such as
+    # allkeys-lru
+    self.client.set(self.prefix + key, value, ex=max(int(ttl), 1))
+
+class PageCache:
+
+  def __init__(self, backend=None, ttl=60):
+    # backend None disables caching
+    self.backend = backend
+    self.ttl = ttl
+
+  def get(self, key):
+    if self.backend is None:
+      return None
+    return self.backend.get(key)
+
+  def set(self, key, value, ttl=None):
+    if self.backend is not None:
+      self.backend.set(key, value, self.ttl if ttl is None else ttl)
+    return value
+
+def fromConfig(config):
+  backend = config.get('PAGE_CACHE_BACKEND', 'memory')
+  if backend == 'memory':
+    return PageCache(MemoryBackend(config.get('PAGE_CACHE_MAX_ENTRIES', 1024)), config.get('PAGE_CACHE_TTL', 60))
+  if backend == 'redis':
+    return PageCache(RedisBackend(config['PAGE_CACHE_URL']), config.get('PAGE_CACHE_TTL', 60))
+  return PageCache(None)
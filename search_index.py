@@ -0,0 +1,125 @@
+#----------------------------------------------------------------------------#
+# In-process n-gram search index for venue and artist names.
+#
+# Every name is indexed under all of its 1..N character grams (lowercased).
+# A search term of up to N characters is answered by a single posting list,
+# a longer term by intersecting the postings of its N-grams and checking the
+# candidates with a substring test. The index lives in the worker process:
+# each worker builds its own copy and only sees the writes it handles itself.
+#----------------------------------------------------------------------------#
+
+import heapq
+import sys
+import threading
+import time
+
+def grams(text, n):
+  text = text.lower()
+  found = set()
+  for size in range(1, n + 1):
+    for start in range(len(text) - size + 1):
+      found.add(text[start:start + size])
+  return found
+
+class NgramIndex:
+
+  def __init__(self, n=3):
+    self.n = n
+    self.entries = {}   # id -> {'id', 'name', 'num_upcoming_shows'}
+    self.postings = {}  # gram -> set of ids
+    self.built = False
+    self.build_seconds = None
+    self.lock = threading.Lock()
+
+  def build(self, rows):
+    # rows: iterable of (id, name, num_upcoming_shows)
+    start = time.perf_counter()
+    entries = {}
+    postings = {}
+    for entity_id, name, num_upcoming_shows in rows:
+      entries[entity_id] = {'id': entity_id, 'name': name, 'num_upcoming_shows': num_upcoming_shows}
+      for gram in grams(name or '', self.n):
+        postings.setdefault(gram, set()).add(entity_id)
+    with self.lock:
+      self.entries = entries
+      self.postings = postings
+      self.built = True
+      self.build_seconds = time.perf_counter() - start
+
+  def add(self, entity_id, name, num_upcoming_shows=0):
+    # writes before the first build are covered by the build itself
+    if not self.built:
+      return
+    with self.lock:
+      self._remove(entity_id)
+      self.entries[entity_id] = {'id': entity_id, 'name': name, 'num_upcoming_shows': num_upcoming_shows}
+      for gram in grams(name or '', self.n):
+        self.postings.setdefault(gram, set()).add(entity_id)
+
+  def rename(self, entity_id, name):
+    if not self.built:
+      return
+    with self.lock:
+      entry = self.entries.get(entity_id)
+    self.add(entity_id, name, entry['num_upcoming_shows'] if entry else 0)
+
+  def setUpcoming(self, entity_id, num_upcoming_shows):
+    if not self.built:
+      return
+    with self.lock:
+      entry = self.entries.get(entity_id)
+      if entry:
+        entry['num_upcoming_shows'] = num_upcoming_shows
+
+  def remove(self, entity_id):
+    if not self.built:
+      return
+    with self.lock:
+      self._remove(entity_id)
+
+  def _remove(self, entity_id):
+    entry = self.entries.pop(entity_id, None)
+    if entry is None:
+      return
+    for gram in grams(entry['name'] or '', self.n):
+      ids = self.postings.get(gram)
+      if ids is not None:
+        ids.discard(entity_id)
+        if len(ids) == 0:
+          del self.postings[gram]
+
+  def search(self, term, limit=None):
+    term = term.lower()
+    with self.lock:
+      if term == '':
+        candidates = set(self.entries)
+      elif len(term) <= self.n:
+        candidates = set(self.postings.get(term, ()))
+      else:
+        lists = sorted(
+          (self.postings.get(term[i:i + self.n], set()) for i in range(len(term) - self.n + 1)),
+          key=len
+        )
+        candidates = set(lists[0]).intersection(*lists[1:])
+      results = [dict(self.entries[i]) for i in candidates]
+    if len(term) > self.n:
+      results = [r for r in results if term in (r['name'] or '').lower()]
+    if limit is not None:
+      return heapq.nsmallest(limit, results, key=lambda r: r['name'] or '')
+    return sorted(results, key=lambda r: r['name'] or '')
+
+  def stats(self):
+    # approximate footprint of the containers, their keys and id sets
+    with self.lock:
+      size = sys.getsizeof(self.entries) + sys.getsizeof(self.postings)
+      for entry in self.entries.values():
+        size += sys.getsizeof(entry) + sys.getsizeof(entry['name'])
+      for gram, ids in self.postings.items():
+        size += sys.getsizeof(gram) + sys.getsizeof(ids)
+      return {
+        'entries': len(self.entries),
+        'grams': len(self.postings),
+        'postings': sum(len(ids) for ids in self.postings.values()),
+        'memory_bytes': size,
+        'build_seconds': self.build_seconds
+      }
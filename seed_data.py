@@ -0,0 +1,145 @@
+#----------------------------------------------------------------------------#
+# Synthetic catalog generator.
+#
+# The same seed, scale and anchor date always produce the same venues,
+# artists and shows. Rows are written in batches through the bulk import
+# writers (COPY on PostgreSQL with psycopg2, multi-row INSERTs elsewhere).
+# Ids are assigned here, after the largest existing id, so genre rows and
+# shows can be generated without reading anything back.
+#----------------------------------------------------------------------------#
+
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, text
+
+import bulk_import
+
+CITIES = [
+  ('San Francisco', 'CA'), ('Los Angeles', 'CA'), ('New York', 'NY'), ('Brooklyn', 'NY'),
+  ('Austin', 'TX'), ('Houston', 'TX'), ('Chicago', 'IL'), ('Seattle', 'WA'),
+  ('Portland', 'OR'), ('Nashville', 'TN'), ('New Orleans', 'LA'), ('Denver', 'CO'),
+  ('Boston', 'MA'), ('Atlanta', 'GA'), ('Miami', 'FL'), ('Detroit', 'MI'),
+]
+WORDS = [
+  'Blue', 'Golden', 'Velvet', 'Electric', 'Silver', 'Crimson', 'Wild', 'Lucky', 'Midnight',
+  'Rusty', 'Neon', 'Howling', 'Lonesome', 'Copper', 'Paper', 'Iron', 'Sweet', 'Broken',
+]
+VENUE_KINDS = ['Hall', 'Room', 'Lounge', 'Club', 'Theatre', 'Tavern', 'Garage', 'Ballroom']
+ARTIST_KINDS = ['Band', 'Trio', 'Collective', 'Orchestra', 'Sisters', 'Brothers', 'Project', 'Quartet']
+
+def _name(rng, number, kinds):
+  return '%s %s %s %d' % (rng.choice(WORDS), rng.choice(WORDS), rng.choice(kinds), number)
+
+def _phone(rng):
+  return '%03d-%03d-%04d' % (rng.randint(200, 999), rng.randint(200, 999), rng.randint(0, 9999))
+
+def venues(rng, first_id, count, genre_ids):
+  for venue_id in range(first_id, first_id + count):
+    city, state = rng.choice(CITIES)
+    yield {
+      'id': venue_id, 'name': _name(rng, venue_id, VENUE_KINDS), 'city': city, 'state': state,
+      'address': '%d %s St' % (rng.randint(1, 9999), rng.choice(WORDS)), 'phone': _phone(rng),
+      'image_link': 'https://images.example.com/venues/%d.jpg' % venue_id,
+      'facebook_link': 'https://www.facebook.com/venue%d' % venue_id,
+      'website': 'https://venue%d.example.com' % venue_id,
+      'seeking_talent': rng.random() < 0.3, 'seeking_description': None,
+    }, rng.sample(genre_ids, rng.randint(1, 3))
+
+def artists(rng, first_id, count, genre_ids):
+  for artist_id in range(first_id, first_id + count):
+    city, state = rng.choice(CITIES)
+    yield {
+      'id': artist_id, 'name': _name(rng, artist_id, ARTIST_KINDS), 'city': city, 'state': state,
+      'phone': _phone(rng), 'image_link': 'https://images.example.com/artists/%d.jpg' % artist_id,
+      'facebook_link': 'https://www.facebook.com/artist%d' % artist_id,
+      'website': 'https://artist%d.example.com' % artist_id,
+      'seeking_venue': rng.random() < 0.5, 'seeking_description': None,
+    }, rng.sample(genre_ids, rng.randint(1, 2))
+
+def shows(rng, artist_ids, venue_ids, count, anchor):
+  # show i is artist i % A at the (i // A)-th venue after the artist's own
+  # offset, so (artist_id, venue_id) never repeats while count <= A * V
+  if count > len(artist_ids) * len(venue_ids):
+    raise ValueError('at most %d shows fit %d artists and %d venues'
+      % (len(artist_ids) * len(venue_ids), len(artist_ids), len(venue_ids)))
+  offsets = [rng.randrange(len(venue_ids)) for _ in artist_ids]
+  for number in range(count):
+    artist = number % len(artist_ids)
+    venue = (offsets[artist] + number // len(artist_ids)) % len(venue_ids)
+    # two years back to one year ahead, on the hour, in the evening
+    day = anchor + timedelta(days=rng.randint(-730, 365))
+    yield {
+      'artist_id': artist_ids[artist], 'venue_id': venue_ids[venue],
+      'start_time': day.replace(hour=rng.randint(18, 23), minute=0, second=0, microsecond=0),
+    }
+
+def _write(db, table, rows, batch_size, now):
+  writer = None
+  batch = []
+  for row in rows:
+    if 'updated_at' in table.c:
+      row['updated_at'] = now
+    batch.append(row)
+    if len(batch) >= batch_size:
+      writer = writer or bulk_import.makeWriter(db.session, table, list(batch[0]))
+      writer.write(batch)
+      db.session.commit()
+      batch = []
+  if batch:
+    writer = writer or bulk_import.makeWriter(db.session, table, list(batch[0]))
+    writer.write(batch)
+    db.session.commit()
+
+def _entities(db, table, link, key, generated, batch_size, now):
+  # the entity rows, then their genre rows
+  links = []
+
+  def rows():
+    for row, genre_ids in generated:
+      links.extend({key: row['id'], 'genre_id': genre_id} for genre_id in genre_ids)
+      yield row
+
+  _write(db, table, rows(), batch_size, now)
+  _write(db, link, iter(links), batch_size, now)
+
+def _restartIdentity(db, table):
+  # ids were given explicitly: move PostgreSQL's identity past them
+  if db.session.get_bind().dialect.name == 'postgresql':
+    next_id = (db.session.scalar(select(func.max(table.c.id))) or 0) + 1
+    db.session.execute(text('ALTER TABLE "%s" ALTER COLUMN id RESTART WITH %d' % (table.name, next_id)))
+    db.session.commit()
+
+def seed(db, tables, genre_names, venue_count, artist_count, show_count, seed=1, anchor=None,
+    batch_size=5000, echo=print):
+  # tables: dict of the Venue, Artist, show, Genre, venue_genre and
+  # artist_genre tables; anchor: the date shows are spread around
+  rng = random.Random(seed)
+  anchor = anchor or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+  now = datetime.now(timezone.utc).replace(tzinfo=None)
+  start = time.perf_counter()
+
+  existing = set(db.session.scalars(select(tables['genre'].c.name)))
+  missing = [name for name in genre_names if name not in existing]
+  if missing:
+    db.session.execute(tables['genre'].insert(), [{'name': name} for name in missing])
+    db.session.commit()
+  genre_ids = sorted(db.session.scalars(select(tables['genre'].c.id)))
+
+  first_venue = (db.session.scalar(select(func.max(tables['venue'].c.id))) or 0) + 1
+  first_artist = (db.session.scalar(select(func.max(tables['artist'].c.id))) or 0) + 1
+  _entities(db, tables['venue'], tables['venue_genre'], 'venue_id',
+            venues(rng, first_venue, venue_count, genre_ids), batch_size, now)
+  echo('%d venues (%.1fs)' % (venue_count, time.perf_counter() - start))
+  _entities(db, tables['artist'], tables['artist_genre'], 'artist_id',
+            artists(rng, first_artist, artist_count, genre_ids), batch_size, now)
+  echo('%d artists (%.1fs)' % (artist_count, time.perf_counter() - start))
+  _restartIdentity(db, tables['venue'])
+  _restartIdentity(db, tables['artist'])
+
+  artist_ids = list(range(first_artist, first_artist + artist_count))
+  venue_ids = list(range(first_venue, first_venue + venue_count))
+  if show_count > 0:
+    _write(db, tables['show'], shows(rng, artist_ids, venue_ids, show_count, anchor), batch_size, now)
+  echo('%d shows (%.1fs)' % (show_count, time.perf_counter() - start))
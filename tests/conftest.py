@@ -0,0 +1,81 @@
+#----------------------------------------------------------------------------#
+# Test fixtures: an app on a fresh SQLite database per test, holding a small
+# catalog of three venues, three artists and their shows.
+#----------------------------------------------------------------------------#
+
+import html
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config as default_config  # noqa: E402
+from app import create_app  # noqa: E402
+from catalog import refreshAllShowCounters  # noqa: E402
+from forms import GENRES  # noqa: E402
+from models import db, Show, Genre, Venue, Artist  # noqa: E402
+
+
+def make_app(path, **settings):
+    # config.py with the test database and overrides
+    values = {key: getattr(default_config, key) for key in dir(default_config) if key.isupper()}
+    values.update(
+        SQLALCHEMY_DATABASE_URI='sqlite:///%s' % path, TESTING=True, WTF_CSRF_ENABLED=False,
+        QUERY_BUDGET_ACTION='raise', DATABASE_REPLICA_URLS=[], METRICS_DIR=None,
+    )
+    values.update(settings)
+    return create_app(type('TestConfig', (), values))
+
+
+def listed_names(page):
+    # entity names of a listing page, in order
+    return [html.unescape(name) for name in re.findall(r'<h5>(.*?)</h5>', page)]
+
+
+def seed_catalog(now=None):
+    now = now or datetime.now()
+    genres = {name: Genre(name=name) for name in GENRES}
+    db.session.add_all(genres.values())
+    venues = [
+        Venue(name='The Musical Hop', city='San Francisco', state='CA', address='1015 Folsom Street',
+              genres=[genres['Jazz'], genres['Reggae']]),
+        Venue(name='Park Square Live Music & Coffee', city='San Francisco', state='CA', address='34 Whiskey Moore Ave',
+              genres=[genres['Rock n Roll'], genres['Jazz']]),
+        Venue(name='The Dueling Pianos Bar', city='New York', state='NY', address='335 Delancey Street',
+              genres=[genres['Classical']]),
+    ]
+    artists = [
+        Artist(name='Guns N Petals', city='San Francisco', state='CA', genres=[genres['Rock n Roll']]),
+        Artist(name='Matt Quevedo', city='New York', state='NY', genres=[genres['Jazz']]),
+        Artist(name='The Wild Sax Band', city='San Francisco', state='CA', genres=[genres['Jazz'], genres['Classical']]),
+    ]
+    db.session.add_all(venues + artists)
+    db.session.flush()
+    db.session.execute(Show.insert(), [
+        {'artist_id': artists[0].id, 'venue_id': venues[0].id, 'start_time': now - timedelta(days=30)},
+        {'artist_id': artists[1].id, 'venue_id': venues[0].id, 'start_time': now + timedelta(days=30)},
+        {'artist_id': artists[2].id, 'venue_id': venues[1].id, 'start_time': now + timedelta(days=60)},
+        {'artist_id': artists[2].id, 'venue_id': venues[2].id, 'start_time': now - timedelta(days=60)},
+    ])
+    db.session.commit()
+    refreshAllShowCounters()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path / 'fyyur.db')
+    with app.app_context():
+        # the primary only: apps with replicas leave their bind keys on db
+        db.create_all(bind_key=None)
+        seed_catalog()
+    yield app
+    app.extensions['async_db'].close()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from models import db, Show, Venue
+
+
+def test_list_fields_and_limit(client):
+    payload = client.get('/api/v1/venues?fields=name,genres&limit=1').get_json()
+    assert payload['data'] == [{'name': 'The Musical Hop', 'genres': ['Jazz', 'Reggae']}]
+    payload = client.get('/api/v1/venues?fields=name&after=' + payload['next_cursor']).get_json()
+    assert [row['name'] for row in payload['data']] == ['Park Square Live Music & Coffee', 'The Dueling Pianos Bar']
+    assert payload['next_cursor'] is None
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.get('/api/v1/artists?fields=bogus')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'unknown field: bogus'}
+
+
+def test_detail(client):
+    payload = client.get('/api/v1/artists/3').get_json()
+    assert payload['name'] == 'The Wild Sax Band'
+    assert client.get('/api/v1/artists/99').status_code == 404
+
+
+def test_shows_in_start_time_order(client):
+    payload = client.get('/api/v1/shows?fields=venue_id,artist_id').get_json()
+    assert payload['data'] == [
+        {'venue_id': 3, 'artist_id': 3}, {'venue_id': 1, 'artist_id': 1},
+        {'venue_id': 1, 'artist_id': 2}, {'venue_id': 2, 'artist_id': 3},
+    ]
+
+
+def test_list_counts_follow_started_shows(app, client):
+    payload = client.get('/api/v1/venues?fields=id,upcoming_shows_count').get_json()
+    assert payload['data'][0] == {'id': 1, 'upcoming_shows_count': 1}
+    # time passes: the upcoming show of venue 1 has started
+    started = datetime.now() - timedelta(minutes=1)
+    with app.app_context():
+        db.session.execute(update(Show).where(Show.c.venue_id == 1).values(start_time=started))
+        db.session.execute(update(Venue).where(Venue.id == 1).values(next_show_time=started))
+        db.session.commit()
+    payload = client.get('/api/v1/venues?fields=id,upcoming_shows_count').get_json()
+    assert payload['data'][0] == {'id': 1, 'upcoming_shows_count': 0}
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from async_db import fromConfig
+from conftest import make_app, seed_catalog
+from instrumentation import QueryBudgetExceeded
+from models import db
+
+
+@pytest.fixture
+def uncached_app(tmp_path):
+    app = make_app(tmp_path / 'fyyur.db', PAGE_CACHE_BACKEND='none')
+    with app.app_context():
+        db.create_all(bind_key=None)
+        seed_catalog()
+    yield app
+    app.extensions['async_db'].close()
+
+
+@pytest.mark.parametrize('path', ['/venues/1', '/venues/2', '/artists/1', '/artists/3'])
+def test_async_detail_page_matches_sync(uncached_app, path):
+    client = uncached_app.test_client()
+    sync = client.get(path)
+    uncached_app.config['ASYNC_DETAIL_PAGES'] = True
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == sync.get_data(as_text=True)
+
+
+def test_async_detail_page_not_found(uncached_app):
+    uncached_app.config['ASYNC_DETAIL_PAGES'] = True
+    assert uncached_app.test_client().get('/venues/99').status_code == 404
+
+
+def test_timeout_cancels_query(uncached_app):
+    async_db = fromConfig(uncached_app.config)
+    cancelled = threading.Event()
+
+    async def slow(engine):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        async_db.run(slow, timeout=0.05)
+    assert cancelled.wait(1)
+    async_db.close()
+
+
+def test_detail_page_timeout_is_unavailable(uncached_app):
+    uncached_app.config.update(ASYNC_DETAIL_PAGES=True, ASYNC_DB_TIMEOUT=0.05)
+    async_db = uncached_app.extensions['async_db']
+    async_db.start()
+    # the worker's loop is busy past the timeout
+    async_db.loop.call_soon_threadsafe(time.sleep, 0.3)
+    assert uncached_app.test_client().get('/venues/1').status_code == 503
+
+
+
+def test_async_queries_count_against_the_request(uncached_app, monkeypatch):
+    uncached_app.config['ASYNC_DETAIL_PAGES'] = True
+    client = uncached_app.test_client()
+    client.get('/venues/1').close()
+    text = client.get('/metrics').get_data(as_text=True)
+    # the validators, then the row, genres and shows on the async engine
+    assert 'fyyur_db_queries_per_request_sum{route="/venues/<int:venue_id>"} 4' in text
+    monkeypatch.setattr(uncached_app.view_functions['venues.show_venue'], 'query_budget', 3)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/venues/1')
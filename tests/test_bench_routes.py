@@ -0,0 +1,30 @@
+import bench_routes
+from models import db, Venue, Artist
+
+
+def test_every_route_answers_without_server_error(app):
+    results = bench_routes.run(app, db, Venue.__table__, Artist.__table__, repeat=1, warmup=0, echo=lambda line: None)
+    assert set(results) == {route[0] for route in bench_routes.ROUTES}
+    assert not bench_routes.compare(results, {})
+
+
+def test_bench_routes_command_leaves_configured_database_alone(app, tmp_path):
+    with app.app_context():
+        before = db.session.scalars(db.select(Venue.name).order_by(Venue.id)).all()
+    baseline = str(tmp_path / 'baseline.json')
+    result = app.test_cli_runner().invoke(args=[
+        'bench-routes', '--repeat', '1', '--warmup', '0', '--venues', '10', '--artists', '20', '--shows', '50',
+        '--baseline', baseline, '--save',
+    ])
+    assert result.exit_code == 0, result.output
+    assert set(bench_routes.load(baseline)) == {route[0] for route in bench_routes.ROUTES}
+    with app.app_context():
+        assert db.session.scalars(db.select(Venue.name).order_by(Venue.id)).all() == before
+
+
+def test_bench_routes_command_refuses_configured_database(app):
+    result = app.test_cli_runner().invoke(args=[
+        'bench-routes', '--database-url', app.config['SQLALCHEMY_DATABASE_URI'],
+    ])
+    assert result.exit_code == 2
+    assert 'throwaway' in result.output
@@ -0,0 +1,34 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import bulk_import
+from models import db, Show
+
+
+def test_import_shows_counts_duplicates_and_removes_checkpoint(app, tmp_path):
+    path = str(tmp_path / 'shows.ndjson')
+    with open(path, 'w') as f:
+        for record in [
+            {'artist_id': 1, 'venue_id': 1, 'start_time': '2030-01-01 20:00:00'},
+            {'artist_id': 1, 'venue_id': 2, 'start_time': '2030-01-02 20:00:00'},
+            {'artist_id': 1, 'venue_id': 888, 'start_time': '2030-01-03 20:00:00'},
+        ]:
+            f.write(json.dumps(record) + '\n')
+    result = app.test_cli_runner().invoke(args=['import-catalog', 'shows', path])
+    assert result.exit_code == 0, result.output
+    assert '1 rows accepted, 1 duplicates, 1 rejected' in result.output
+    assert not os.path.exists(path + '.checkpoint')
+    with app.app_context():
+        assert db.session.query(Show).count() == 5
+
+
+@pytest.mark.parametrize('driver', ['psycopg', 'psycopg2'])
+def test_postgresql_drivers_copy(app, driver):
+    bind = SimpleNamespace(dialect=SimpleNamespace(name='postgresql', driver=driver))
+    session = SimpleNamespace(get_bind=lambda: bind)
+    with app.app_context():
+        writer = bulk_import.makeWriter(session, Show, ['artist_id', 'venue_id', 'start_time'])
+    assert isinstance(writer, bulk_import.CopyWriter)
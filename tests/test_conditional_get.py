@@ -0,0 +1,25 @@
+def test_listing_answers_304_until_written(client):
+    response = client.get('/artists')
+    etag = response.headers['ETag']
+    assert client.get('/artists', headers={'If-None-Match': etag}).status_code == 304
+    client.post('/artists/create', data={'name': 'New Band', 'city': 'Austin', 'state': 'TX', 'genres': ['Jazz']})
+    response = client.get('/artists', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert 'New Band' in response.get_data(as_text=True)
+
+
+def test_detail_page_answers_304_until_written(client):
+    response = client.get('/venues/1')
+    etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+    assert client.get('/venues/1', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/venues/1', headers={'If-Modified-Since': last_modified}).status_code == 304
+    # a show scheduled at the venue
+    client.post('/shows/create', data={'artist_id': '3', 'venue_id': '1', 'start_time': '2031-01-01 20:00:00'})
+    response = client.get('/venues/1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'The Wild Sax Band' in response.get_data(as_text=True)
+
+
+def test_unknown_entity_is_not_found(client):
+    assert client.get('/artists/99').status_code == 404
@@ -0,0 +1,49 @@
+import shutil
+
+import pytest
+
+from conftest import make_app, seed_catalog
+from db_routing import COOKIE
+from models import db
+
+VENUE_FORM = {
+    'name': 'The Musical Hall', 'city': 'San Francisco', 'state': 'CA', 'address': '1015 Folsom Street',
+    'genres': ['Jazz'],
+}
+
+
+@pytest.fixture
+def replicated_app(tmp_path):
+    # the copy does not follow later writes: what it answers shows where a read went
+    primary = tmp_path / 'fyyur.db'
+    replica = tmp_path / 'fyyur-replica.db'
+    seeded = make_app(primary)
+    with seeded.app_context():
+        db.create_all(bind_key=None)
+        seed_catalog()
+        db.engine.dispose()
+    seeded.extensions['async_db'].close()
+    shutil.copy(primary, replica)
+    app = make_app(primary, DATABASE_REPLICA_URLS=['sqlite:///%s' % replica])
+    yield app
+    app.extensions['async_db'].close()
+
+
+def test_writer_reads_own_writes(replicated_app):
+    writer = replicated_app.test_client()
+    assert writer.post('/venues/1/edit', data=VENUE_FORM).status_code == 302
+    assert writer.get_cookie(COOKIE) is not None
+    assert writer.get('/api/v1/venues/1').get_json()['name'] == 'The Musical Hall'
+    # other clients read the replica, which has not caught up
+    assert replicated_app.test_client().get('/api/v1/venues/1').get_json()['name'] == 'The Musical Hop'
+
+
+def test_replica_pages_are_not_cached(replicated_app):
+    reader = replicated_app.test_client()
+    writer = replicated_app.test_client()
+    writer.post('/venues/1/edit', data=VENUE_FORM)
+    # a reader renders the page from the lagging replica after the invalidation
+    assert 'The Musical Hop' in reader.get('/venues/1').get_data(as_text=True)
+    assert 'The Musical Hop' in reader.get('/artists/1').get_data(as_text=True)
+    assert 'The Musical Hall' in writer.get('/venues/1').get_data(as_text=True)
+    assert 'The Musical Hall' in writer.get('/artists/1').get_data(as_text=True)
@@ -0,0 +1,13 @@
+import csv
+import io
+
+
+def test_export_needs_token(app, client):
+    assert client.get('/export/venues').status_code == 404
+    app.config['EXPORT_TOKEN'] = 'secret'
+    assert client.get('/export/venues').status_code == 403
+    assert client.get('/export/venues', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    response = client.get('/export/venues?state=NY', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['name'] for row in rows] == ['The Dueling Pianos Bar']
@@ -0,0 +1,25 @@
+from conftest import listed_names as names
+
+
+def test_genre_filter(client):
+    assert names(client.get('/artists?genre=Jazz').get_data(as_text=True)) == ['Matt Quevedo', 'The Wild Sax Band']
+    assert names(client.get('/venues?genre=Classical').get_data(as_text=True)) == ['The Dueling Pianos Bar']
+
+
+def test_area_counts_follow_genre_filter(client):
+    html = client.get('/venues?areas=1&genre=Rock+n+Roll').get_data(as_text=True)
+    assert 'San Francisco, CA <small>1 venue</small>' in html
+    assert 'New York' not in html
+
+
+def test_search_genre_filter(client):
+    page = client.post('/venues/search', data={'search_term': '', 'genre': 'Jazz'}).get_data(as_text=True)
+    assert 'The Musical Hop' in page and 'Park Square' in page and 'Dueling Pianos' not in page
+
+
+def test_edit_replaces_genres(app, client):
+    client.post('/artists/1/edit', data={
+        'name': 'Guns N Petals', 'city': 'San Francisco', 'state': 'CA', 'genres': ['Jazz', 'Blues'],
+    })
+    assert 'Guns N Petals' in names(client.get('/artists?genre=Blues').get_data(as_text=True))
+    assert 'Guns N Petals' not in names(client.get('/artists?genre=Rock+n+Roll').get_data(as_text=True))
@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models import db
+
+
+def test_failed_statement_leaves_no_query_timer(app):
+    with app.app_context():
+        with db.engine.connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.execute(text('SELECT * FROM no_such_table'))
+            assert connection.info.get('query_start') == []
+            connection.execute(text('SELECT 1'))
+            assert connection.info.get('query_start') == []
+
+
+def test_metrics_endpoint_counts_requests(client):
+    # recorded once the body is sent
+    client.get('/venues').close()
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'fyyur_http_requests_total{' in body
+    assert 'route="/venues"' in body
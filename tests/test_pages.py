@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from conftest import make_app
+from models import db, Show, Venue
+
+
+def test_detail_page_moves_started_show_to_past(app, client):
+    assert '1 Upcoming Show' in client.get('/venues/1').get_data(as_text=True)
+    # time passes: the upcoming show of venue 1 has started
+    started = datetime.now() - timedelta(minutes=1)
+    with app.app_context():
+        db.session.execute(update(Show).where(Show.c.venue_id == 1).values(start_time=started))
+        db.session.execute(update(Venue).where(Venue.id == 1).values(next_show_time=started))
+        db.session.commit()
+    html = client.get('/venues/1').get_data(as_text=True)
+    assert '0 Upcoming Shows' in html
+    assert '2 Past Shows' in html
+
+
+def test_edit_drops_cached_pages(client):
+    assert 'The Musical Hop' in client.get('/venues/1').get_data(as_text=True)
+    assert 'The Musical Hop' in client.get('/artists/1').get_data(as_text=True)
+    client.post('/venues/1/edit', data={
+        'name': 'The Musical Hall', 'city': 'San Francisco', 'state': 'CA', 'address': '1015 Folsom Street',
+        'genres': ['Jazz'],
+    })
+    assert 'The Musical Hall' in client.get('/venues/1').get_data(as_text=True)
+    # the artist page lists the show at the renamed venue
+    assert 'The Musical Hall' in client.get('/artists/1').get_data(as_text=True)
+
+
+def test_other_worker_write_is_not_served_from_cache(app, client):
+    # a second worker on the same database, with its own memory cache
+    other = make_app(app.config['SQLALCHEMY_DATABASE_URI'][len('sqlite:///'):])
+    assert 'Guns N Petals' in client.get('/shows').get_data(as_text=True)
+    assert 'Guns N Petals' in client.get('/venues/1').get_data(as_text=True)
+    etag = client.get('/shows').headers['ETag']
+    other.test_client().post('/artists/1/edit', data={
+        'name': 'Renamed Artist', 'city': 'San Francisco', 'state': 'CA', 'genres': ['Rock n Roll'],
+    })
+    other.extensions['async_db'].close()
+    response = client.get('/shows', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'Renamed Artist' in response.get_data(as_text=True)
+    assert client.get('/shows', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert 'Renamed Artist' in client.get('/venues/1').get_data(as_text=True)
@@ -0,0 +1,47 @@
+import re
+
+import pytest
+
+from conftest import listed_names as names, make_app, seed_catalog
+from helpers import encodeCursor
+from models import db
+
+
+@pytest.fixture
+def paged_client(tmp_path):
+    app = make_app(tmp_path / 'fyyur.db', PAGE_SIZE=2)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        seed_catalog()
+    yield app.test_client()
+    app.extensions['async_db'].close()
+
+
+def next_link(html):
+    match = re.search(r'href="([^"]*after=[^"]*)"', html)
+    return match.group(1).replace('&amp;', '&') if match else None
+
+
+def test_artists_pages_follow_cursor(paged_client):
+    html = paged_client.get('/artists').get_data(as_text=True)
+    assert names(html) == ['Guns N Petals', 'Matt Quevedo']
+    html = paged_client.get(next_link(html)).get_data(as_text=True)
+    assert names(html) == ['The Wild Sax Band']
+    assert next_link(html) is None
+
+
+def test_venues_pages_follow_cursor(paged_client):
+    html = paged_client.get('/venues').get_data(as_text=True)
+    first = names(html)
+    html = paged_client.get(next_link(html)).get_data(as_text=True)
+    assert sorted(first + names(html)) == sorted([
+        'The Musical Hop', 'Park Square Live Music & Coffee', 'The Dueling Pianos Bar'])
+
+
+def test_bad_cursor_is_rejected(paged_client):
+    assert paged_client.get('/artists?after=zzz').status_code == 400
+    assert paged_client.get('/venues?after=' + encodeCursor(['only one'])).status_code == 400
+
+
+def test_null_in_cursor_round_trips(paged_client):
+    assert paged_client.get('/venues?after=' + encodeCursor([None, None, 0])).status_code == 200
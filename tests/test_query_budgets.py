@@ -0,0 +1,79 @@
+# Every route within its query budget, in 'raise' mode (the suite's
+# default): cold, served from the page cache, and refreshing expired show
+# counters on the way.
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from instrumentation import QueryBudgetExceeded
+from models import db, Venue, Artist
+
+READ_ROUTES = [
+    '/venues', '/venues?areas=1', '/venues?genre=Jazz', '/artists', '/artists?genre=Jazz', '/shows',
+    '/venues/1', '/artists/1', '/api/v1/venues', '/api/v1/venues/1?fields=name,genres,past_shows,upcoming_shows',
+    '/api/v1/artists?fields=id,name,genres', '/api/v1/artists/1?fields=name,genres,past_shows,upcoming_shows',
+    '/api/v1/shows',
+]
+SEARCH_ROUTES = ['/venues/search', '/artists/search']
+
+
+def expire_show_counters(app):
+    # as if the next show of every venue and artist had just started
+    with app.app_context():
+        for model in (Venue, Artist):
+            db.session.execute(update(model).values(next_show_time=datetime.now() - timedelta(minutes=1)))
+        db.session.commit()
+
+
+def get(client, path):
+    response = client.get(path)
+    response.get_data()
+    response.close()
+    return response
+
+
+@pytest.mark.parametrize('path', READ_ROUTES)
+def test_read_route_within_budget(app, client, path):
+    assert get(client, path).status_code == 200
+    # second request: page cache and validators warm
+    assert get(client, path).status_code == 200
+    expire_show_counters(app)
+    assert get(client, path).status_code == 200
+
+
+@pytest.mark.parametrize('path', ['/venues/1', '/artists/1'])
+def test_uncached_detail_page_refreshing_counters_within_budget(app, client, path):
+    app.extensions['page_cache'].backend = None
+    expire_show_counters(app)
+    assert get(client, path).status_code == 200
+
+
+@pytest.mark.parametrize('path', SEARCH_ROUTES)
+def test_search_within_budget(app, client, path):
+    assert client.post(path, data={'search_term': 'a'}).status_code == 200
+    expire_show_counters(app)
+    assert client.post(path, data={'search_term': 'a', 'genre': 'Jazz'}).status_code == 200
+
+
+def test_show_scheduling_within_budget(app, client):
+    data = {'artist_id': '1', 'venue_id': '3', 'start_time': '2031-01-01 20:00:00'}
+    assert client.post('/shows/create', data=data).status_code == 200
+    shows = [{'artist_id': 2, 'venue_id': 3, 'start_time': '2031-01-01 20:00:00'},
+             {'artist_id': 3, 'venue_id': 1, 'start_time': '2031-01-01 20:00:00'}]
+    assert client.post('/api/v1/shows', json=shows).status_code == 200
+
+
+def test_overrun_fails_the_request(app, client, monkeypatch):
+    monkeypatch.setattr(app.view_functions['venues.venues'], 'query_budget', 1)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/venues')
+
+
+def test_overrun_answers_500_outside_tests(app, client, monkeypatch):
+    monkeypatch.setattr(app.view_functions['venues.venues'], 'query_budget', 1)
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    response = client.get('/venues')
+    assert response.status_code == 500
+    response.close()
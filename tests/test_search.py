@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from catalog import searchIndex
+from conftest import make_app, seed_catalog
+from models import db, Show, Venue
+
+
+@pytest.fixture
+def indexed_app(tmp_path):
+    app = make_app(tmp_path / 'fyyur.db', SEARCH_INDEX_ENABLED=True)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        seed_catalog()
+    yield app
+    app.extensions['async_db'].close()
+
+
+def test_search_index(indexed_app):
+    client = indexed_app.test_client()
+    html = client.post('/venues/search', data={'search_term': 'music'}).get_data(as_text=True)
+    assert 'The Musical Hop' in html and 'Park Square Live Music &amp; Coffee' in html
+    html = client.post('/artists/search', data={'search_term': 'BAND'}).get_data(as_text=True)
+    assert 'The Wild Sax Band' in html and 'Guns N Petals' not in html
+
+
+def test_search_index_counts_follow_started_shows(indexed_app):
+    client = indexed_app.test_client()
+    client.post('/venues/search', data={'search_term': 'hop'})
+    with indexed_app.app_context():
+        assert searchIndex(Venue).search('hop')[0]['num_upcoming_shows'] == 1
+        # time passes: the upcoming show of venue 1 has started
+        started = datetime.now() - timedelta(minutes=1)
+        db.session.execute(update(Show).where(Show.c.venue_id == 1).values(start_time=started))
+        db.session.execute(update(Venue).where(Venue.id == 1).values(next_show_time=started))
+        db.session.commit()
+    client.post('/venues/search', data={'search_term': 'hop'})
+    with indexed_app.app_context():
+        assert searchIndex(Venue).search('hop')[0]['num_upcoming_shows'] == 0
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from catalog import insertShows
+from models import db, Show, Venue
+
+
+def show_count(app, **filters):
+    with app.app_context():
+        return db.session.query(Show).filter_by(**filters).count()
+
+
+def test_show_form_creates_show(app, client):
+    response = client.post('/shows/create', data={'artist_id': '1', 'venue_id': '3', 'start_time': '2031-01-01 20:00:00'})
+    assert response.status_code == 200
+    assert 'Show was successfully listed!' in response.get_data(as_text=True)
+    assert show_count(app, artist_id=1, venue_id=3) == 1
+    with app.app_context():
+        assert db.session.get(Venue, 3).upcoming_shows_count == 1
+
+
+def test_show_form_rejects_missing_venue(app, client):
+    # the foreign key rejects the insert, the ids are then looked up
+    response = client.post('/shows/create', data={'artist_id': '1', 'venue_id': '888', 'start_time': '2031-01-01 20:00:00'})
+    assert response.status_code == 200
+    assert 'does not exist' in response.get_data(as_text=True)
+    assert show_count(app, venue_id=888) == 0
+
+
+def test_show_form_rejects_duplicate_and_bad_time(app, client):
+    data = {'artist_id': '1', 'venue_id': '1', 'start_time': '2031-01-01 20:00:00'}
+    assert 'already exists!' in client.post('/shows/create', data=data).get_data(as_text=True)
+    data = {'artist_id': '1', 'venue_id': '2', 'start_time': 'tomorrow'}
+    assert 'Incorrect format' in client.post('/shows/create', data=data).get_data(as_text=True)
+
+
+def test_schedule_api_reports_each_show(app, client):
+    response = client.post('/api/v1/shows', json={'shows': [
+        {'artist_id': 2, 'venue_id': 3, 'start_time': '2031-02-01 20:00:00'},
+        {'artist_id': 2, 'venue_id': 888, 'start_time': '2031-02-01 20:00:00'},
+        {'artist_id': 999, 'venue_id': 888, 'start_time': '2031-02-01 20:00:00'},
+        {'artist_id': 1, 'venue_id': 1, 'start_time': '2031-02-01 20:00:00'},
+        {'artist_id': 3, 'venue_id': 1, 'start_time': 'soon'},
+    ]})
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert [r['status'] for r in payload['results']] == ['created', 'invalid', 'invalid', 'duplicate', 'invalid']
+    assert payload['results'][1]['errors'] == {'venue_id': ['888 does not exist']}
+    assert payload['results'][2]['errors'] == {'artist_id': ['999 does not exist'], 'venue_id': ['888 does not exist']}
+    assert (payload['created'], payload['duplicate'], payload['invalid']) == (1, 1, 3)
+    assert show_count(app, venue_id=888) == 0
+    assert show_count(app, artist_id=2, venue_id=3) == 1
+
+
+def test_schedule_api_rejects_non_list(client):
+    assert client.post('/api/v1/shows', json={'shows': 'nope'}).status_code == 400
+    assert client.post('/api/v1/shows', data='garbage').status_code == 400
+
+
+def test_shows_page_lists_every_show(client):
+    html = client.get('/shows').get_data(as_text=True)
+    for name in ('Guns N Petals', 'Matt Quevedo', 'The Wild Sax Band'):
+        assert name in html
+
+
+def test_insert_looks_ids_up_only_when_rejected(app):
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        rows = [{'artist_id': 2, 'venue_id': 3, 'start_time': datetime(2031, 1, 1, 20)}]
+        assert insertShows(rows) == ({(2, 3)}, None)
+        assert len(statements) == 1
+        rows = [
+            {'artist_id': 1, 'venue_id': 3, 'start_time': datetime(2031, 1, 1, 20)},
+            {'artist_id': 1, 'venue_id': 888, 'start_time': datetime(2031, 1, 1, 20)},
+        ]
+        assert insertShows(rows) == ({(1, 3)}, ({1}, {3}))
+        db.session.commit()
+        assert db.session.query(Show).filter_by(venue_id=888).count() == 0
@@ -0,0 +1,19 @@
+from conftest import listed_names as names
+
+
+def test_stream_parameter_is_ignored(app, client):
+    # rendered pages have a length, streamed ones are sent in chunks
+    response = client.get('/artists?stream=1')
+    assert 'Content-Length' in response.headers
+    app.config['STREAM_LISTINGS'] = True
+    response = client.get('/artists')
+    assert 'Content-Length' not in response.headers
+    assert names(response.get_data(as_text=True)) == ['Guns N Petals', 'Matt Quevedo', 'The Wild Sax Band']
+
+
+def test_streamed_listings_match_rendered(app, client):
+    venues = names(client.get('/venues').get_data(as_text=True))
+    shows = client.get('/shows').get_data(as_text=True)
+    app.config['STREAM_LISTINGS'] = True
+    assert names(client.get('/venues').get_data(as_text=True)) == venues
+    assert client.get('/shows').get_data(as_text=True) == shows
@@ -0,0 +1,20 @@
+from conftest import listed_names
+
+
+def test_areas_with_counts(client):
+    page = client.get('/venues?areas=1').get_data(as_text=True)
+    assert 'San Francisco, CA <small>2 venues</small>' in page
+    assert 'New York, NY <small>1 venue</small>' in page
+    # the areas alone, their venues one link away
+    assert listed_names(page) == []
+
+
+def test_venues_grouped_by_area(client):
+    page = client.get('/venues').get_data(as_text=True)
+    assert page.index('New York, NY') < page.index('San Francisco, CA')
+    assert listed_names(page) == ['The Dueling Pianos Bar', 'The Musical Hop', 'Park Square Live Music & Coffee']
+
+
+def test_one_area(client):
+    page = client.get('/venues?city=San+Francisco&state=CA').get_data(as_text=True)
+    assert listed_names(page) == ['The Musical Hop', 'Park Square Live Music & Coffee']